@@ -23,17 +23,60 @@ import time
 import subprocess
 import curses
 import re
+import io
+import csv
+import json
+import hashlib
+import multiprocessing.util
+import queue
+import asyncio
+import argparse
+import threading
+import concurrent.futures
+import base64
+import shutil
+import tempfile
+from contextlib import contextmanager
 from urllib.parse import urlparse
-from dataclasses import dataclass
-from typing import Optional, Callable
-from playwright.sync_api import sync_playwright
+from dataclasses import dataclass, asdict, replace
+from typing import Optional, Callable, List, Tuple
+import numpy as np
+from PIL import Image, GifImagePlugin
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, TimeoutError as AsyncPlaywrightTimeoutError
 from moviepy import VideoFileClip
 
+try:
+    import psutil  # Optional: enables RSS-based browser recycling
+except ImportError:
+    psutil = None
+
+try:
+    import yaml  # Optional: YAML batch manifests
+except ImportError:
+    yaml = None
+
 
 # ============================================================
 # PRESETS CONFIGURATION
 # ============================================================
 
+VIEWPORT = {"width": 1260, "height": 720}
+
+# Capture modes
+CAPTURE_SCREENCAST = "screencast"  # Load once, record frames from the same page (CDP)
+CAPTURE_VIDEO = "video"            # Legacy: preload context + fresh recording context
+CAPTURE_VIRTUAL = "virtual"        # Paused page clock, exactly one screenshot per 1/fps
+CAPTURE_STATIC = "static"          # One full-page screenshot, scroll synthesized in NumPy
+CAPTURE_AUTO = "auto"              # CAPTURE_STATIC when the page looks safe for it, else screencast
+
+# Output formats (extra formats are written next to the GIF, same stem)
+FORMAT_GIF = "gif"
+FORMAT_WEBP = "webp"               # Animated WebP
+FORMAT_MP4 = "mp4"                 # H.264, for <video autoplay muted loop>
+FORMAT_APNG = "apng"               # Animated PNG (lossless)
+FORMAT_EXTENSIONS = {FORMAT_GIF: ".gif", FORMAT_WEBP: ".webp", FORMAT_MP4: ".mp4", FORMAT_APNG: ".png"}
+
 @dataclass
 class Preset:
     """Configuration preset for GIF generation"""
@@ -43,7 +86,9 @@ class Preset:
     colors: int
     scroll_step: int
     scroll_delay: float
-    preloader_wait: int
+    preloader_wait: int  # Upper bound (s) for the adaptive preloader detection
+    webp_quality: int = 75  # libwebp quality (0-100) for animated WebP output
+    mp4_crf: int = 26       # x264 CRF for MP4 output (lower = better, larger)
     
 PRESETS = {
     "ultra_small": Preset(
@@ -53,7 +98,9 @@ PRESETS = {
         colors=32,
         scroll_step=120,
         scroll_delay=0.05,
-        preloader_wait=5
+        preloader_wait=5,
+        webp_quality=50,
+        mp4_crf=32
     ),
     "small": Preset(
         name="[2] Small",
@@ -62,7 +109,9 @@ PRESETS = {
         colors=64,
         scroll_step=100,
         scroll_delay=0.04,
-        preloader_wait=5
+        preloader_wait=5,
+        webp_quality=60,
+        mp4_crf=30
     ),
     "balanced": Preset(
         name="[3] Balanced",
@@ -71,7 +120,9 @@ PRESETS = {
         colors=128,
         scroll_step=80,
         scroll_delay=0.035,
-        preloader_wait=5
+        preloader_wait=5,
+        webp_quality=75,
+        mp4_crf=26
     ),
     "quality": Preset(
         name="[4] Quality",
@@ -80,7 +131,9 @@ PRESETS = {
         colors=192,
         scroll_step=60,
         scroll_delay=0.03,
-        preloader_wait=5
+        preloader_wait=5,
+        webp_quality=85,
+        mp4_crf=23
     ),
     "max_quality": Preset(
         name="[5] Maximum",
@@ -89,264 +142,3656 @@ PRESETS = {
         colors=256,
         scroll_step=40,
         scroll_delay=0.025,
-        preloader_wait=5
+        preloader_wait=5,
+        webp_quality=95,
+        mp4_crf=20
     )
 }
 
 
-# ============================================================
-# HELPER FUNCTIONS
-# ============================================================
+# ============================================================
+# HELPER FUNCTIONS
+# ============================================================
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize URL by adding https:// if missing.
+    e.g., "lobjetnorman.hu" -> "https://lobjetnorman.hu"
+         "www.example.com" -> "https://www.example.com"
+         "http://site.com" -> "http://site.com" (keeps http if specified)
+    """
+    url = url.strip()
+    if not url:
+        return url
+    
+    # If no protocol specified, add https://
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    
+    return url
+
+
+def extract_domain_name(url: str) -> str:
+    """
+    Extract clean domain name from URL for filename.
+    e.g., "https://lobjetnorman.hu/page" -> "lobjetnorman"
+    """
+    try:
+        # Normalize URL first
+        url = normalize_url(url)
+        parsed = urlparse(url)
+        domain = parsed.netloc or parsed.path
+        # Remove www. prefix
+        domain = re.sub(r'^www\.', '', domain)
+        # Get only the domain name (without TLD)
+        domain_parts = domain.split('.')
+        if len(domain_parts) >= 2:
+            # Return main domain name (e.g., "lobjetnorman" from "lobjetnorman.hu")
+            return domain_parts[0]
+        return domain
+    except:
+        return "portfolio"
+
+
+def get_dynamic_filename(url: str) -> str:
+    """Generate dynamic filename based on URL domain."""
+    domain = extract_domain_name(url)
+    # Sanitize for filename
+    safe_name = re.sub(r'[^a-zA-Z0-9_-]', '', domain)
+    return f"{safe_name}.gif" if safe_name else "portfolio.gif"
+
+
+# ============================================================
+# BROWSER POOL
+# ============================================================
+
+POOL_SIZE = 1               # Warm browsers kept alive per process
+POOL_MAX_JOBS = 25          # Recycle a browser after this many jobs
+POOL_MAX_RSS_MB = 1500      # Recycle when the browser process tree exceeds this (needs psutil)
+
+
+class _PooledBrowser:
+    """A single warm browser slot inside a BrowserPool."""
+
+    def __init__(self, slot_id: int):
+        self.slot_id = slot_id
+        self.browser = None
+        self.jobs = 0
+        self.busy = 0
+        self.crashed = False
+
+    @property
+    def marker(self) -> str:
+        # Unknown switches are ignored by Chromium, but show up in the process
+        # cmdline so the slot's process tree can be found for RSS accounting.
+        return f"--sitegiffer-slot={os.getpid()}-{self.slot_id}"
+
+    def is_alive(self) -> bool:
+        return self.browser is not None and not self.crashed and self.browser.is_connected()
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of this browser's process tree in MB (None if unknown)."""
+        if psutil is None:
+            return None
+        try:
+            for proc in psutil.Process().children(recursive=True):
+                try:
+                    if self.marker not in proc.cmdline():
+                        continue
+                    tree = [proc] + proc.children(recursive=True)
+                    return sum(p.memory_info().rss for p in tree) / (1024 * 1024)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except psutil.Error:
+            pass
+        return None
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Chromium browsers shared across generate_gif calls.
+    
+    Each job borrows a browser (least busy first) and creates its own fresh
+    contexts on it. A browser is recycled after `max_jobs` jobs or when its
+    process tree grows beyond `max_rss_mb`, and crashed/disconnected browsers
+    are relaunched automatically on the next checkout.
+    
+    The pool uses Playwright's sync API, so it must only be used from the
+    thread that created it.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_jobs: int = POOL_MAX_JOBS,
+                 max_rss_mb: Optional[float] = POOL_MAX_RSS_MB, headless: bool = True):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self._playwright = None
+        self._slots: List[_PooledBrowser] = [_PooledBrowser(i) for i in range(self.size)]
+        self.launches = 0
+        self.recycles = 0
+
+    def __enter__(self):
+        # Browsers are launched lazily on the first checkout
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self) -> "BrowserPool":
+        """Start Playwright and warm up every browser slot."""
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        for slot in self._slots:
+            if not slot.is_alive():
+                self._launch(slot)
+        return self
+
+    def close(self):
+        """Close every browser and stop Playwright."""
+        for slot in self._slots:
+            self._shutdown(slot)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def _launch(self, slot: _PooledBrowser):
+        self._shutdown(slot)
+        slot.browser = self._playwright.chromium.launch(
+            headless=self.headless, args=[slot.marker]
+        )
+        slot.browser.on("disconnected", lambda _browser: setattr(slot, "crashed", True))
+        slot.crashed = False
+        slot.jobs = 0
+        self.launches += 1
+
+    def _shutdown(self, slot: _PooledBrowser):
+        if slot.browser is not None:
+            try:
+                slot.browser.close()
+            except Exception:
+                pass
+        slot.browser = None
+
+    def _needs_recycle(self, slot: _PooledBrowser) -> bool:
+        if not slot.is_alive():
+            return True
+        if self.max_jobs and slot.jobs >= self.max_jobs:
+            return True
+        if self.max_rss_mb:
+            rss = slot.rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    @contextmanager
+    def browser(self):
+        """
+        Borrow a warm browser for one job.
+        
+        Usage:
+            with pool.browser() as browser:
+                context = browser.new_context(...)
+        """
+        if self._playwright is None:
+            self.start()
+        
+        slot = min(self._slots, key=lambda s: (s.busy, s.jobs))
+        if not slot.is_alive():
+            self._launch(slot)
+        
+        slot.busy += 1
+        try:
+            yield slot.browser
+        finally:
+            slot.busy -= 1
+            slot.jobs += 1
+            # Recycle between jobs only, never under a running capture
+            if slot.busy == 0 and self._needs_recycle(slot):
+                self.recycles += 1
+                self._launch(slot)
+
+
+# ============================================================
+# NETWORK SETTLE DETECTION
+# ============================================================
+
+NAVIGATION_TIMEOUT_MS = 60000   # Until DOMContentLoaded - a dead site still fails
+NETWORK_SETTLE_TIMEOUT = 15     # Max seconds to wait for tracked requests after that
+NETWORK_QUIET_MS = 500          # No tracked request in flight for this long = settled
+LONG_LIVED_REQUEST_S = 5        # fetch/xhr open longer than this is treated as long-polling
+FALLBACK_QUIET_S = 1.0          # Quiet window used when the network never settles
+
+# Only these resource types hold up "settled"; websockets, eventsource,
+# media streams and beacons (ping) are never waited for.
+SETTLE_RESOURCE_TYPES = {"document", "script", "stylesheet", "font", "image", "fetch", "xhr"}
+LONG_LIVED_RESOURCE_TYPES = {"fetch", "xhr"}
+
+# Analytics, tag managers, chat widgets and error reporters keep heartbeats open
+NETWORK_IGNORE_PATTERNS = [
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net",
+    r"connect\.facebook\.net", r"facebook\.com/tr", r"hotjar\.(com|io)",
+    r"clarity\.ms", r"segment\.(io|com)", r"mixpanel\.com", r"plausible\.io",
+    r"sentry\.io", r"intercom\.io", r"crisp\.chat", r"tawk\.to", r"zdassets\.com",
+    r"livechatinc\.com", r"/collect\?", r"/beacon",
+]
+
+
+class NetworkSettleTracker:
+    """
+    Track in-flight requests that matter for rendering.
+    
+    Replaces wait_until="networkidle", which never fires on pages that keep a
+    websocket, SSE stream, chat widget or analytics heartbeat open. Ignored
+    URLs and untracked resource types are never counted, and fetch/xhr
+    requests stop counting once they look like long-polling.
+    """
+
+    def __init__(self, page, ignore_patterns: Optional[List[str]] = None):
+        self.page = page
+        self._ignore = re.compile("|".join(ignore_patterns or NETWORK_IGNORE_PATTERNS), re.I)
+        self._inflight = {}
+        self.last_activity = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def detach(self):
+        for event, handler in (("request", self._on_request),
+                               ("requestfinished", self._on_done),
+                               ("requestfailed", self._on_done)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    def _on_request(self, request):
+        if request.resource_type in SETTLE_RESOURCE_TYPES and not self._ignore.search(request.url):
+            self._inflight[request] = time.monotonic()
+            self.last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if self._inflight.pop(request, None) is not None:
+            self.last_activity = time.monotonic()
+
+    def pending(self) -> int:
+        """Number of tracked requests still expected to finish."""
+        now = time.monotonic()
+        return sum(
+            1 for request, started in self._inflight.items()
+            if request.resource_type not in LONG_LIVED_RESOURCE_TYPES
+            or now - started < LONG_LIVED_REQUEST_S
+        )
+
+    def is_quiet(self, quiet_ms: float = NETWORK_QUIET_MS) -> bool:
+        return self.pending() == 0 and (time.monotonic() - self.last_activity) * 1000 >= quiet_ms
+
+    def wait_quiet(self, timeout: float, quiet_ms: float = NETWORK_QUIET_MS) -> bool:
+        """Block until quiet (True) or timeout seconds pass (False)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_quiet(quiet_ms):
+                return True
+            # Short Playwright wait so request events keep being dispatched
+            self.page.wait_for_timeout(50)
+        return self.is_quiet(quiet_ms)
+
+    async def wait_quiet_async(self, timeout: float, quiet_ms: float = NETWORK_QUIET_MS) -> bool:
+        """wait_quiet() for playwright.async_api pages."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_quiet(quiet_ms):
+                return True
+            await asyncio.sleep(0.05)
+        return self.is_quiet(quiet_ms)
+
+
+def goto_and_settle(page, url: str) -> str:
+    """
+    Navigate to url and wait until its network has settled.
+    
+    Falls back to the load event plus a short quiet window when tracked
+    requests never finish, instead of failing the whole job.
+    
+    Returns:
+        How the page settled: "settled" or "load+quiet"
+    """
+    tracker = NetworkSettleTracker(page)
+    try:
+        page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
+        
+        start = time.monotonic()
+        try:
+            page.wait_for_load_state("load", timeout=NETWORK_SETTLE_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            pass  # A hung subresource blocked "load"; the tracker decides below
+        
+        remaining = NETWORK_SETTLE_TIMEOUT - (time.monotonic() - start)
+        if tracker.wait_quiet(max(0.0, remaining)):
+            return "settled"
+        
+        page.wait_for_timeout(FALLBACK_QUIET_S * 1000)
+        return "load+quiet"
+    finally:
+        tracker.detach()
+
+
+# ============================================================
+# PAGE READINESS (ADAPTIVE PRELOADER DETECTION)
+# ============================================================
+
+READY_SETTLE_MS = 300      # Ready conditions must hold this long (loaders often fade in steps)
+READY_POLL_MS = 100        # Re-check interval for changes MutationObserver can't see (CSS transitions)
+
+# Elements that commonly implement preloaders / intro overlays
+PRELOADER_SELECTORS = [
+    "[class*='preload' i]", "[id*='preload' i]",
+    "[class*='loader' i]", "[id*='loader' i]",
+    "[class*='loading' i]", "[id*='loading' i]",
+    "[class*='splash' i]", "[id*='splash' i]",
+    "[class*='intro-overlay' i]", "[aria-busy='true']",
+]
+
+# Main content containers (first match wins; if none exist the check passes)
+MAIN_SELECTORS = ["main", "[role='main']", "#__next > *", "#root > *", "#app > *", "body > *"]
+
+# Resolves once no preloader overlay covers the viewport, scrolling is not
+# locked and the main container is visible - or when the upper bound expires.
+READINESS_JS = """
+(opts) => new Promise((resolve) => {
+    const start = performance.now();
+    const vw = window.innerWidth, vh = window.innerHeight;
+    const loaderSelector = opts.preloaderSelectors.join(',');
+    let readySince = null, reason = '', done = false, observer = null, timer = null;
+
+    const visible = (el) => {
+        const cs = getComputedStyle(el);
+        if (cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) < 0.05) return false;
+        const r = el.getBoundingClientRect();
+        return r.width > 0 && r.height > 0 && r.bottom > 0 && r.right > 0 && r.top < vh && r.left < vw;
+    };
+    const coversViewport = (el) => {
+        const r = el.getBoundingClientRect();
+        const w = Math.min(r.right, vw) - Math.max(r.left, 0);
+        const h = Math.min(r.bottom, vh) - Math.max(r.top, 0);
+        return w > 0 && h > 0 && (w * h) / (vw * vh) >= 0.9;
+    };
+    const overlayPresent = () => {
+        for (const el of document.querySelectorAll(loaderSelector)) {
+            // <html>/<body> state classes ("preloaded", "is-loading") are not overlays
+            if (el === document.documentElement || el === document.body) continue;
+            if (visible(el) && coversViewport(el)) return true;
+        }
+        // Unnamed overlays: a high z-index fixed layer on top of the viewport centre
+        let el = document.elementFromPoint(vw / 2, vh / 2);
+        while (el && el !== document.body && el !== document.documentElement) {
+            const cs = getComputedStyle(el);
+            if (cs.position === 'fixed' && (parseInt(cs.zIndex, 10) || 0) >= 100 &&
+                cs.pointerEvents !== 'none' && visible(el) && coversViewport(el)) return true;
+            el = el.parentElement;
+        }
+        return false;
+    };
+    const scrollLocked = () => {
+        const root = document.scrollingElement || document.documentElement;
+        const locked = [document.documentElement, document.body].some(
+            (el) => el && getComputedStyle(el).overflowY === 'hidden');
+        return locked && root.scrollHeight > vh;
+    };
+    const mainVisible = () => {
+        for (const sel of opts.mainSelectors) {
+            const el = document.querySelector(sel);
+            if (el) return visible(el);
+        }
+        return true;
+    };
+    const finish = (ready, why) => {
+        if (done) return;
+        done = true;
+        if (observer) observer.disconnect();
+        clearInterval(timer);
+        resolve({ready: ready, reason: why, waited_ms: performance.now() - start});
+    };
+    const check = () => {
+        if (done) return;
+        const now = performance.now();
+        let blocker = '';
+        if (document.readyState !== 'complete') blocker = 'document';
+        else if (overlayPresent()) blocker = 'overlay';
+        else if (scrollLocked()) blocker = 'scroll-lock';
+        else if (!mainVisible()) blocker = 'main-hidden';
+        else if (document.fonts && document.fonts.status !== 'loaded') blocker = 'fonts';
+
+        if (blocker) {
+            readySince = null;
+            reason = blocker;
+        } else if (readySince === null) {
+            readySince = now;
+        } else if (now - readySince >= opts.settleMs) {
+            return finish(true, reason ? reason + '-cleared' : 'immediate');
+        }
+        if (now - start >= opts.timeoutMs) finish(false, 'timeout:' + reason);
+    };
+
+    observer = new MutationObserver(check);
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true,
+        attributeFilter: ['class', 'style', 'hidden', 'aria-busy'],
+    });
+    timer = setInterval(check, opts.pollMs);
+    check();
+})
+"""
+
+
+def readiness_options(max_wait: float) -> dict:
+    """Arguments for READINESS_JS."""
+    return {
+        "preloaderSelectors": PRELOADER_SELECTORS,
+        "mainSelectors": MAIN_SELECTORS,
+        "settleMs": READY_SETTLE_MS,
+        "pollMs": READY_POLL_MS,
+        "timeoutMs": max_wait * 1000,
+    }
+
+
+def wait_for_page_ready(page, max_wait: float) -> Tuple[bool, float, str]:
+    """
+    Wait until the site's preloader has finished, bounded by max_wait seconds.
+    
+    Returns:
+        (ready, waited_seconds, reason) - ready is False if the upper bound hit
+    """
+    start = time.time()
+    try:
+        result = page.evaluate(READINESS_JS, readiness_options(max_wait))
+        return result["ready"], result["waited_ms"] / 1000, result["reason"]
+    except Exception:
+        # Page navigated / script blocked - fall back to the fixed wait
+        remaining = max_wait - (time.time() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        return False, time.time() - start, "fallback"
+
+
+# ============================================================
+# SCREENCAST CAPTURE
+# ============================================================
+
+def write_ffconcat(frames_dir: str, paths: List[str], durations: List[float]) -> str:
+    """Write an ffconcat list for frame images inside frames_dir. Returns its path."""
+    concat_path = os.path.join(frames_dir, "frames.ffconcat")
+    with open(concat_path, "w") as f:
+        f.write("ffconcat version 1.0\n")
+        for path, duration in zip(paths, durations):
+            f.write(f"file '{os.path.basename(path)}'\n")
+            f.write(f"duration {duration:.6f}\n")
+        # The concat demuxer ignores the last duration unless the file is repeated
+        f.write(f"file '{os.path.basename(paths[-1])}'\n")
+    return concat_path
+
+
+class ScreencastRecorder:
+    """
+    Record frames from an already-loaded page using the CDP screencast.
+    
+    Unlike record_video_dir this attaches to a live page, so the site is
+    loaded (and its preloader run) only once. With a sink (FrameResampler)
+    the JPEGs are streamed straight to the encoder; otherwise they are
+    written to frames_dir with their compositor timestamps and stop()
+    writes an ffconcat list with per-frame durations that ffmpeg reads as
+    a variable frame rate input.
+    """
+
+    def __init__(self, page, frames_dir: str, quality: int = 90, sink: Optional["FrameResampler"] = None):
+        self.page = page
+        self.frames_dir = frames_dir
+        self.quality = quality
+        self.sink = sink
+        self.frames: List[Tuple[str, float]] = []
+        self.frame_count = 0
+        self.end_time = None
+        self._cdp = None
+
+    def start(self):
+        """Start streaming frames from the page."""
+        self._cdp = self.page.context.new_cdp_session(self.page)
+        self._cdp.on("Page.screencastFrame", self._on_frame)
+        self._cdp.send("Page.startScreencast", {
+            "format": "jpeg",
+            "quality": self.quality,
+            "maxWidth": VIEWPORT["width"],
+            "maxHeight": VIEWPORT["height"],
+            "everyNthFrame": 1,
+        })
+
+    def _store_frame(self, params):
+        data = base64.b64decode(params["data"])
+        timestamp = params.get("metadata", {}).get("timestamp") or time.time()
+        self.frame_count += 1
+        if self.sink is not None:
+            self.sink.push(data, timestamp)
+            return
+        path = os.path.join(self.frames_dir, f"frame_{len(self.frames):06d}.jpg")
+        with open(path, "wb") as f:
+            f.write(data)
+        self.frames.append((path, timestamp))
+
+    def _on_frame(self, params):
+        self._store_frame(params)
+        try:
+            self._cdp.send("Page.screencastFrameAck", {"sessionId": params["sessionId"]})
+        except Exception:
+            pass
+
+    def stop(self) -> Optional[str]:
+        """
+        Stop streaming. Returns the ffconcat path, or None if there were no
+        frames or they went to the sink.
+        """
+        self.end_time = time.time()
+        try:
+            self._cdp.send("Page.stopScreencast")
+            self._cdp.detach()
+        except Exception:
+            pass
+        return self._finish()
+
+    def _finish(self) -> Optional[str]:
+        if self.sink is not None:
+            self.sink.finish(self.end_time)
+            return None
+        if not self.frames:
+            return None
+        return write_ffconcat(self.frames_dir, self.frame_paths, self.frame_durations)
+
+    @property
+    def frame_paths(self) -> List[str]:
+        return [path for path, _ in self.frames]
+
+    @property
+    def frame_durations(self) -> List[float]:
+        """How long each frame stays on screen (the last one until stop())."""
+        times = [ts for _, ts in self.frames] + [self.end_time or self.frames[-1][1]]
+        return [max(0.001, b - a) for a, b in zip(times, times[1:])]
+
+
+# ============================================================
+# VIRTUAL-TIME CAPTURE
+# ============================================================
+
+MAX_VIRTUAL_DURATION = 300  # Safety cap (s of page time) if the scroll never reports done
+
+
+class VirtualTimeRecorder:
+    """
+    Deterministic capture: pause the page clock and step it by exactly 1/fps.
+    
+    Timers, requestAnimationFrame, Date and performance.now are faked with
+    Playwright's clock, so the in-page scroll driver and JS animations only
+    advance when a frame is taken. The result has exactly one frame per
+    1/fps of page time (no dropped frames, no scroll_delay sleeps), and on
+    simple pages it finishes faster than real time. Compositor-driven CSS
+    animations still run on the real clock.
+    """
+
+    def __init__(self, page, frames_dir: str, fps: int, quality: int = 90,
+                 sink: Optional[Callable[[bytes], None]] = None):
+        self.page = page
+        self.frames_dir = frames_dir
+        self.fps = fps
+        self.quality = quality
+        self.sink = sink  # Receives each JPEG instead of writing it to frames_dir
+        self.frame_paths: List[str] = []
+        self.frame_count = 0
+
+    @property
+    def frame_durations(self) -> List[float]:
+        return [1.0 / self.fps] * len(self.frame_paths)
+
+    def _store_frame(self, data: bytes):
+        self.frame_count += 1
+        if self.sink is not None:
+            self.sink(data)
+            return
+        path = os.path.join(self.frames_dir, f"frame_{len(self.frame_paths):06d}.jpg")
+        with open(path, "wb") as f:
+            f.write(data)
+        self.frame_paths.append(path)
+
+    def _capture_frame(self):
+        self._store_frame(self.page.screenshot(type="jpeg", quality=self.quality))
+
+    def _finish(self) -> Optional[str]:
+        if not self.frame_paths:
+            return None
+        return write_ffconcat(self.frames_dir, self.frame_paths, self.frame_durations)
+
+    def record_scroll(self, scroll_step: int, delay: float, hold: float = 0.3) -> Optional[str]:
+        """Scroll to the bottom in virtual time. Returns the ffconcat path (None if no frames)."""
+        frame_ms = 1000.0 / self.fps
+        
+        self.page.clock.install()
+        self.page.clock.pause_at(int(time.time() * 1000 + frame_ms))
+        
+        # Start the scroll driver without awaiting it - it only progresses
+        # when the paused clock is advanced below
+        self.page.evaluate(f"(opts) => {{ ({SCROLL_DRIVER_JS})(opts); }}",
+                           scroll_driver_options(1, scroll_step, delay, hold))
+        
+        self._capture_frame()
+        max_frames = int(MAX_VIRTUAL_DURATION * self.fps)
+        while self.frame_count < max_frames:
+            self.page.clock.run_for(frame_ms)
+            if self.page.evaluate("window.__siteGifferScroll.done"):
+                break
+            self._capture_frame()
+        
+        return self._finish()
+
+
+# ============================================================
+# STATIC CAPTURE (SYNTHETIC SCROLL FROM ONE SCREENSHOT)
+# ============================================================
+
+STATIC_MAX_PAGE_HEIGHT = 16384   # Chromium full-page captures get unreliable beyond this
+STATIC_IMAGE_TIMEOUT_MS = 5000   # Max wait for lazy images forced to load eagerly
+
+# Force lazy images to load (a full-page capture never scrolls them into view)
+EAGER_IMAGES_JS = """
+(timeoutMs) => {
+    const images = Array.from(document.images);
+    images.forEach((img) => { if (img.loading === 'lazy') img.loading = 'eager'; });
+    const pending = images.filter((img) => !img.complete).map((img) => new Promise((resolve) => {
+        img.addEventListener('load', resolve, {once: true});
+        img.addEventListener('error', resolve, {once: true});
+    }));
+    return Promise.race([
+        Promise.all(pending),
+        new Promise((resolve) => setTimeout(resolve, timeoutMs)),
+    ]).then(() => pending.length);
+}
+"""
+
+# Reports why a synthetic scroll would not look like the real one
+STATIC_SAFETY_JS = """
+(maxHeight) => {
+    const reasons = [];
+    const root = document.scrollingElement || document.documentElement;
+    const vh = window.innerHeight;
+    const libraries = {
+        'gsap-scrolltrigger': () => !!window.ScrollTrigger,
+        'lenis': () => !!window.lenis || !!window.Lenis || document.documentElement.classList.contains('lenis'),
+        'locomotive': () => !!window.LocomotiveScroll || !!document.querySelector('[data-scroll-container]'),
+        'scrollmagic': () => !!window.ScrollMagic,
+        'skrollr': () => !!window.skrollr,
+        'aos': () => !!window.AOS || !!document.querySelector('[data-aos]'),
+        'sal': () => !!document.querySelector('[data-sal]'),
+        'wow': () => !!window.WOW || !!document.querySelector('.wow'),
+        'data-scroll': () => !!document.querySelector('[data-scroll], [data-scroll-speed]'),
+    };
+    for (const [name, test] of Object.entries(libraries)) {
+        try { if (test()) reasons.push('library:' + name); } catch (e) {}
+    }
+    if (root.scrollHeight > maxHeight) reasons.push('page-too-tall');
+
+    const animations = document.getAnimations ? document.getAnimations() : [];
+    if (animations.some((a) => a.timeline && a.timeline.constructor && /Scroll|View/.test(a.timeline.constructor.name))) {
+        reasons.push('scroll-timeline');
+    }
+    const looping = animations.filter((a) => a.playState === 'running' &&
+        a.effect && a.effect.getTiming().iterations === Infinity).length;
+    if (looping) reasons.push('looping-animations:' + looping);
+
+    const media = Array.from(document.querySelectorAll('video, canvas')).filter((el) => {
+        const r = el.getBoundingClientRect();
+        return r.width * r.height > window.innerWidth * vh * 0.1;
+    }).length;
+    if (media) reasons.push('video-or-canvas:' + media);
+
+    // Reveal-on-scroll content: hidden now, shown by an IntersectionObserver later
+    let hidden = 0;
+    for (const el of document.body.querySelectorAll('h1, h2, h3, p, img, section > *')) {
+        const r = el.getBoundingClientRect();
+        if (r.top < vh || r.height === 0) continue;
+        const cs = getComputedStyle(el);
+        if (parseFloat(cs.opacity) < 0.1 || cs.visibility === 'hidden') hidden++;
+    }
+    if (hidden >= 3) reasons.push('reveal-on-scroll:' + hidden);
+    return reasons;
+}
+"""
+
+# Marks top-level fixed/sticky elements with data-sg-pin and returns their geometry
+PINNED_LAYOUT_JS = """
+() => {
+    window.scrollTo({top: 0, behavior: 'instant'});
+    const pinned = [];
+    for (const el of document.body.querySelectorAll('*')) {
+        const cs = getComputedStyle(el);
+        if (cs.position !== 'fixed' && cs.position !== 'sticky') continue;
+        if (el.parentElement && el.parentElement.closest('[data-sg-pin]')) continue;
+        if (cs.display === 'none' || cs.visibility === 'hidden') continue;
+        const r = el.getBoundingClientRect();
+        if (r.width < 1 || r.height < 1) continue;
+        const container = el.parentElement.getBoundingClientRect();
+        el.setAttribute('data-sg-pin', String(pinned.length));
+        pinned.push({
+            kind: cs.position,
+            x: Math.round(r.left), y: Math.round(r.top),
+            width: Math.round(r.width), height: Math.round(r.height),
+            sticky_top: isNaN(parseFloat(cs.top)) ? null : parseFloat(cs.top),
+            container_bottom: Math.round(container.bottom),
+        });
+    }
+    const root = document.scrollingElement || document.documentElement;
+    return {pinned: pinned, scroll_height: root.scrollHeight};
+}
+"""
+
+HIDE_PINNED_CSS = "[data-sg-pin] { visibility: hidden !important; }"
+
+def decode_image(data: bytes, mode: str = "RGB") -> np.ndarray:
+    """Decode PNG/JPEG bytes into a numpy array."""
+    return np.asarray(Image.open(io.BytesIO(data)).convert(mode))
+
+
+def ease_in_out(t: np.ndarray) -> np.ndarray:
+    """Sine ease-in-out on [0, 1]."""
+    return 0.5 - 0.5 * np.cos(np.pi * np.clip(t, 0.0, 1.0))
+
+
+def static_capture_safe(page) -> Tuple[bool, List[str]]:
+    """
+    Decide whether CAPTURE_STATIC reproduces this page faithfully.
+    
+    Returns:
+        (safe, reasons) - reasons lists every scroll-linked feature found
+    """
+    try:
+        reasons = page.evaluate(STATIC_SAFETY_JS, STATIC_MAX_PAGE_HEIGHT)
+    except Exception as e:
+        reasons = [f"check-failed:{type(e).__name__}"]
+    return not reasons, reasons
+
+
+class StaticScrollRenderer:
+    """
+    Synthesize scroll frames from a single full-page screenshot.
+    
+    The page is captured once with its fixed and sticky elements hidden;
+    those are captured separately as transparent layers. Every frame is
+    then a 1260x720 crop of the background along an easing curve, with
+    the pinned layers composited on top, generated in NumPy at any fps.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.background = None
+        self.fixed_layer = None   # (RGBA pixels, x, y) cropped to its opaque area
+        self.sticky_layers = []   # [(geometry, RGBA pixels)]
+
+    def capture(self):
+        """Take the background screenshot and the pinned-element layers."""
+        self.page.evaluate(EAGER_IMAGES_JS, STATIC_IMAGE_TIMEOUT_MS)
+        layout = self.page.evaluate(PINNED_LAYOUT_JS)
+        
+        self.background = decode_image(self._screenshot(HIDE_PINNED_CSS, full_page=True))
+        
+        fixed = self._fixed_selector(layout)
+        if fixed:
+            self._set_fixed_layer(decode_image(
+                self._screenshot(self._show_only_css(fixed), omit_background=True), "RGBA"))
+        
+        for selector, pin in self._sticky_pins(layout):
+            pixels = decode_image(
+                self._screenshot(self._show_only_css(selector), selector, omit_background=True), "RGBA")
+            self.sticky_layers.append((pin, pixels))
+        
+        self.page.evaluate("window.scrollTo({top: 0, behavior: 'instant'})")
+
+    def _screenshot(self, css: str, selector: Optional[str] = None, **options) -> bytes:
+        """PNG screenshot of the page (or one element) with extra CSS applied."""
+        style = self.page.add_style_tag(content=css)
+        try:
+            target = self.page.locator(selector) if selector else self.page
+            return target.screenshot(type="png", **options)
+        finally:
+            style.evaluate("el => el.remove()")
+
+    @staticmethod
+    def _fixed_selector(layout: dict) -> str:
+        return ", ".join(f'[data-sg-pin="{i}"]' for i, pin in enumerate(layout["pinned"])
+                         if pin["kind"] == "fixed")
+
+    @staticmethod
+    def _sticky_pins(layout: dict) -> List[Tuple[str, dict]]:
+        return [(f'[data-sg-pin="{i}"]', pin) for i, pin in enumerate(layout["pinned"])
+                if pin["kind"] == "sticky" and pin["sticky_top"] is not None]
+
+    def _set_fixed_layer(self, layer: np.ndarray):
+        # Keep only the opaque region so compositing touches few pixels
+        ys, xs = np.nonzero(layer[..., 3])
+        if len(ys):
+            self.fixed_layer = (layer[ys.min():ys.max() + 1, xs.min():xs.max() + 1],
+                                int(xs.min()), int(ys.min()))
+
+    @staticmethod
+    def _show_only_css(selector: str) -> str:
+        """CSS that hides everything except the elements matching selector."""
+        parts = [part.strip() for part in selector.split(",")]
+        visible = ", ".join(f"{part}, {part} *" for part in parts)
+        return (
+            "html, body { background: transparent !important; }\n"
+            "body * { visibility: hidden !important; }\n"
+            f"{visible} {{ visibility: visible !important; }}\n"
+        )
+
+    @property
+    def max_scroll(self) -> int:
+        return max(0, self.background.shape[0] - VIEWPORT["height"])
+
+    @staticmethod
+    def _composite(frame: np.ndarray, layer: np.ndarray, x: int, y: int):
+        """Alpha-blend an RGBA layer onto frame in place, clipped to the frame."""
+        fh, fw = frame.shape[:2]
+        lh, lw = layer.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(fw, x + lw), min(fh, y + lh)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = layer[y0 - y:y1 - y, x0 - x:x1 - x].astype(np.uint16)
+        dst = frame[y0:y1, x0:x1].astype(np.uint16)
+        alpha = src[..., 3:4]
+        frame[y0:y1, x0:x1] = ((src[..., :3] * alpha + dst * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+    def render(self, scroll_y: int) -> np.ndarray:
+        """Render the viewport at a given scroll offset."""
+        height = VIEWPORT["height"]
+        frame = self.background[scroll_y:scroll_y + height].copy()
+        if frame.shape[0] < height:
+            frame = np.pad(frame, ((0, height - frame.shape[0]), (0, 0), (0, 0)), constant_values=255)
+        
+        for pin, pixels in self.sticky_layers:
+            # Sticks at its `top` offset, but never leaves its containing block
+            natural = pin["y"] - scroll_y
+            stuck = max(natural, pin["sticky_top"])
+            y = min(stuck, pin["container_bottom"] - scroll_y - pin["height"])
+            self._composite(frame, pixels, pin["x"], int(y))
+        
+        if self.fixed_layer is not None:
+            pixels, x, y = self.fixed_layer
+            self._composite(frame, pixels, x, y)
+        return frame
+
+    def scroll_positions(self, fps: int, scroll_step: int, scroll_delay: float, hold: float = 0.3) -> np.ndarray:
+        """Eased scroll offsets lasting as long as the live scroll would (steps x delay)."""
+        steps = int(self.max_scroll / scroll_step) + 1
+        scroll_frames = max(2, round(steps * scroll_delay * fps))
+        t = np.linspace(0.0, 1.0, scroll_frames)
+        positions = np.round(ease_in_out(t) * self.max_scroll).astype(int)
+        return np.concatenate([positions, np.full(round(hold * fps), self.max_scroll, dtype=int)])
+
+    def frames(self, fps: int, scroll_step: int, scroll_delay: float, hold: float = 0.3):
+        """Yield RGB frames (H x W x 3 uint8) for the whole scroll."""
+        for scroll_y in self.scroll_positions(fps, scroll_step, scroll_delay, hold):
+            yield self.render(int(scroll_y))
+
+
+# ============================================================
+# STREAMING ENCODER
+# ============================================================
+
+def pipe_input_args(fps: int) -> List[str]:
+    """ffmpeg input arguments for JPEG frames piped at a constant rate."""
+    return ["-f", "image2pipe", "-c:v", "mjpeg", "-framerate", str(fps), "-i", "-"]
+
+
+class FrameResampler:
+    """
+    Turn variable-rate timestamped frames into a constant-rate stream.
+    
+    The CDP screencast only emits a frame when something was painted; each
+    output tick at 1/fps repeats the latest frame painted before it, which
+    is what ffmpeg's fps filter did with the ffconcat input.
+    """
+
+    def __init__(self, fps: int, emit: Callable[[bytes], None]):
+        self.interval = 1.0 / fps
+        self.emit = emit
+        self.start = None
+        self.last = None
+        self.ticks = 0
+
+    def _fill(self, until: float):
+        while self.last is not None and self.start + self.ticks * self.interval < until:
+            self.emit(self.last)
+            self.ticks += 1
+
+    def push(self, data: bytes, timestamp: float):
+        if self.start is None:
+            self.start = timestamp
+        self._fill(timestamp)
+        self.last = data
+
+    def finish(self, end_time: Optional[float]):
+        """Emit the held frame up to end_time (at least once)."""
+        if end_time is not None:
+            self._fill(end_time)
+        if self.ticks == 0 and self.last is not None:
+            self.emit(self.last)
+            self.ticks = 1
+
+
+PIPELINE_QUEUE_SIZE = 32  # Frames buffered in front of each stage before backpressure
+
+
+class PipelineStage:
+    """One threaded stage of a FramePipeline, with busy-time accounting."""
+
+    def __init__(self, name: str, process: Callable[[bytes], Optional[list]],
+                 flush: Optional[Callable[[], Optional[list]]] = None):
+        self.name = name
+        self.process = process  # item -> list of items for the next stage (or None)
+        self.flush = flush      # end of stream -> remaining items (or None)
+        self.busy = 0.0
+        self.items = 0
+        self.max_depth = 0
+        self._depth_total = 0
+        self.queue: Optional[queue.Queue] = None
+
+    def stats(self, wall: float) -> dict:
+        return {
+            "items": self.items,
+            "busy_s": round(self.busy, 3),
+            "occupancy": round(self.busy / wall, 3) if wall > 0 else 0.0,
+            "queue_max": self.max_depth,
+            "queue_avg": round(self._depth_total / self.items, 2) if self.items else 0.0,
+        }
+
+
+class FramePipeline:
+    """
+    Bounded multi-stage pipeline for captured frames.
+    
+    Each stage runs in its own thread and reads from a bounded queue, so a
+    slow stage pushes back on the capture instead of buffering without
+    limit, and every stage works while the page is still scrolling. Busy
+    time per stage and queue depths are recorded so the bottleneck shows
+    up in the job report.
+    """
+
+    _END = object()
+
+    def __init__(self, stages: List[PipelineStage], maxsize: int = PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.error = None
+        self._start = time.monotonic()
+        self._end = None
+        for stage in stages:
+            stage.queue = queue.Queue(maxsize=maxsize)
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,), name=f"pipeline-{stage.name}", daemon=True)
+            for i, stage in enumerate(stages)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _forward(self, index: int, items):
+        if index + 1 < len(self.stages) and items:
+            for item in items:
+                self._put(index + 1, item)
+
+    def _put(self, index: int, item):
+        stage = self.stages[index]
+        stage.queue.put(item)
+        depth = stage.queue.qsize()
+        stage.max_depth = max(stage.max_depth, depth)
+        stage._depth_total += depth
+
+    def _run(self, index: int):
+        stage = self.stages[index]
+        while True:
+            item = stage.queue.get()
+            if item is self._END:
+                if stage.flush is not None and self.error is None:
+                    try:
+                        self._forward(index, stage.flush())
+                    except Exception as e:
+                        self.error = self.error or e
+                if index + 1 < len(self.stages):
+                    self.stages[index + 1].queue.put(self._END)
+                return
+            if self.error is not None:
+                continue  # Keep draining so producers never block on a failed stage
+            started = time.monotonic()
+            try:
+                outputs = stage.process(item)
+            except Exception as e:
+                self.error = e
+                continue
+            stage.busy += time.monotonic() - started
+            stage.items += 1
+            self._forward(index, outputs)
+
+    def put(self, item):
+        """Feed one item into the first stage (blocks while its queue is full)."""
+        self._put(0, item)
+
+    def close(self):
+        """Signal end of stream and wait for every stage to drain."""
+        self.stages[0].queue.put(self._END)
+        for thread in self._threads:
+            thread.join()
+        self._end = time.monotonic()
+
+    def stats(self) -> dict:
+        wall = (self._end or time.monotonic()) - self._start
+        return {stage.name: stage.stats(wall) for stage in self.stages}
+
+
+TRIM_THUMB_SIZE = (160, 90)  # Frames are compared as grayscale thumbnails of this size
+TRIM_BLANK_STD = 6.0         # Thumbnail std (8-bit levels) below which a frame is blank/unpainted
+TRIM_MOTION_MAD = 0.5        # Mean abs difference to the previous frame that counts as motion
+TRIM_SETTLE_MAX = 8          # Lead-in frames that may still be painting before one is kept anyway
+TRIM_SCROLL_ROWS = 30        # Largest per-frame scroll (thumbnail rows) told apart from repainting
+
+
+def jpeg_thumbnail(data: bytes) -> np.ndarray:
+    """Grayscale TRIM_THUMB_SIZE thumbnail of a JPEG (decoded at reduced scale)."""
+    im = Image.open(io.BytesIO(data))
+    im.draft("L", TRIM_THUMB_SIZE)
+    return np.asarray(im.convert("L").resize(TRIM_THUMB_SIZE), dtype=np.float32)
+
+
+def frame_thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Grayscale thumbnail of an RGB frame, comparable to jpeg_thumbnail()."""
+    return np.asarray(Image.fromarray(frame).convert("L").resize(TRIM_THUMB_SIZE), dtype=np.float32)
+
+
+def scrolled(thumb: np.ndarray, prev: np.ndarray) -> bool:
+    """Whether thumb is prev scrolled down (content shifted up) rather than repainted in place."""
+    in_place = np.abs(thumb - prev).mean()
+    shifted = min(np.abs(thumb[:-rows] - prev[rows:]).mean() for rows in range(1, TRIM_SCROLL_ROWS + 1))
+    return shifted < in_place / 2
+
+
+class ContentTrimmer:
+    """
+    Drops the blank lead-in and the static tail of a frame stream.
+    
+    Frames are dropped until the first painted one (thumbnail not near
+    uniform - the white or solid screen before first paint), and then
+    while the page keeps changing in place - text shown before its images
+    or web fonts arrive. The lead-in ends with the first frame that no
+    longer changes or that starts the scroll, or after TRIM_SETTLE_MAX
+    frames, and only its last frame is kept.
+    After that, frames without motion are held back and only released
+    once motion resumes, so a pause mid-scroll survives but the hold at the
+    end is dropped at end of stream. At least one frame is always kept.
+    """
+
+    def __init__(self):
+        self.prev = None
+        self.settling = None  # Latest lead-in frame while the page may still be painting
+        self.settle_frames = 0
+        self.held = []
+        self.last = None
+        self.kept = 0
+        self.lead_in = 0
+        self.tail = 0
+
+    def push(self, thumb: np.ndarray, item) -> list:
+        """Feed one frame (its thumbnail and payload); returns the payloads to pass on."""
+        self.last = item
+        if self.prev is None:
+            if thumb.std() < TRIM_BLANK_STD:
+                self.lead_in += 1
+                return []
+            self.prev, self.settling = thumb, item
+            return []
+        moving = np.abs(thumb - self.prev).mean() >= TRIM_MOTION_MAD
+        released = []
+        if self.settling is not None:
+            if moving and self.settle_frames < TRIM_SETTLE_MAX and not scrolled(thumb, self.prev):
+                # Still painting in place - this frame supersedes the previous one
+                self.prev, self.settling = thumb, item
+                self.settle_frames += 1
+                self.lead_in += 1
+                return []
+            released, self.settling = [self.settling], None
+            self.kept += 1
+        self.prev = thumb
+        if not moving:
+            self.held.append(item)
+            return released
+        self.kept += len(self.held) + 1
+        released, self.held = released + self.held + [item], []
+        return released
+
+    def flush(self) -> list:
+        """End of stream: keep a lead-in frame that never settled, drop the held tail."""
+        self.tail, self.held = len(self.held), []
+        if self.settling is not None:
+            released, self.settling = [self.settling], None
+            self.kept += 1
+            return released
+        if self.kept == 0 and self.last is not None:
+            self.kept, self.lead_in = 1, self.lead_in - 1
+            return [self.last]  # Never painted - keep something
+        return []
+
+    def stage(self) -> PipelineStage:
+        """FramePipeline stage trimming JPEG frames."""
+        return PipelineStage("trim", lambda data: self.push(jpeg_thumbnail(data), data), self.flush)
+
+    def frames(self, frames):
+        """Trim an iterable of RGB frames."""
+        for frame in frames:
+            yield from self.push(frame_thumbnail(frame), frame)
+        yield from self.flush()
+
+    def stats(self) -> dict:
+        return {"kept": self.kept, "lead_in": self.lead_in, "tail": self.tail}
+
+
+class StreamingEncoder:
+    """
+    Long-lived ffmpeg that encodes while capture is still running.
+    
+    Captured JPEGs flow through a FramePipeline whose last stage writes
+    them to ffmpeg's stdin; ffmpeg decodes, scales and gathers palette
+    statistics as they arrive, so only palette application and GIF
+    writing remain once capture ends (none at all with PALETTE_PER_FRAME).
+    There are no intermediate video or frame files, and no extra lossy
+    encode/decode generation.
+    """
+
+    def __init__(self, cmd: List[str], stages: Optional[List[PipelineStage]] = None):
+        self.cmd = cmd
+        self.frames_written = 0
+        self.tail_seconds = None
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.pipeline = FramePipeline(list(stages or []) + [PipelineStage("feed", self._feed)])
+
+    def _feed(self, data: bytes):
+        self.proc.stdin.write(data)
+        self.frames_written += 1
+
+    def write(self, data: bytes):
+        """Queue one encoded frame (JPEG bytes)."""
+        self.pipeline.put(data)
+
+    def close(self):
+        """
+        Flush queued frames and wait for ffmpeg to finish the output.
+        
+        Raises:
+            subprocess.CalledProcessError if ffmpeg failed
+        """
+        self.pipeline.close()
+        tail_start = time.monotonic()
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        returncode = self.proc.wait()
+        self.tail_seconds = round(time.monotonic() - tail_start, 3)
+        if returncode != 0 or self.frames_written == 0 or self.pipeline.error is not None:
+            raise subprocess.CalledProcessError(returncode, self.cmd)
+
+    def abort(self):
+        """Stop ffmpeg without waiting for the output."""
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.pipeline.close()
+        self.proc.wait()
+
+    def stats(self) -> dict:
+        """Stage occupancy / queue depth, plus the encoder tail after capture ended."""
+        return {"stages": self.pipeline.stats(), "encoder_tail_s": self.tail_seconds}
+
+
+# ============================================================
+# NUMPY GIF ENCODER
+# ============================================================
+# The no-ffmpeg fallback. Palette building, dithering, palette mapping and
+# dirty-rectangle detection are vectorized NumPy; the LZW step runs in
+# Pillow's C GIF encoder, one changed rectangle at a time.
+
+PALETTE_SAMPLE_FRAMES = 16   # Evenly spaced frames the fallback palette is built from
+PALETTE_SAMPLE_STRIDE = 4    # Pixel subsampling inside each sampled frame
+GIF_BAYER_STRENGTH = 12      # Ordered-dither amplitude in 8-bit levels (0 disables)
+PALETTE_KEYFRAMES = 32      # Frames an ffmpeg-side palette is median-cut from (plus as many held out)
+PALETTE_HOLDOUT_TOLERANCE = 0.10  # Sampled palette must quantize held-out frames within this of the samples
+
+BAYER_4X4 = np.array([[0, 8, 2, 10],
+                      [12, 4, 14, 6],
+                      [3, 11, 1, 9],
+                      [15, 7, 13, 5]], dtype=np.float32) / 16 - 0.5
+
+
+def rgb555(frame: np.ndarray) -> np.ndarray:
+    """15-bit color code per pixel (5 bits per channel) of an RGB uint8 frame."""
+    frame = frame.astype(np.uint16)
+    return ((frame[..., 0] >> 3) << 10) | ((frame[..., 1] >> 3) << 5) | (frame[..., 2] >> 3)
+
+
+def even_sample(iterable, n: int) -> list:
+    """Keep about n evenly spaced items from an iterable of unknown length."""
+    kept, stride = [], 1
+    for i, item in enumerate(iterable):
+        if i % stride == 0:
+            kept.append(item)
+            if len(kept) == 2 * n:
+                kept, stride = kept[::2], stride * 2
+    return kept[::max(1, len(kept) // n)]
+
+
+def median_cut_palette(samples: List[np.ndarray], colors: int) -> np.ndarray:
+    """
+    Median-cut palette over the RGB555 histogram of the sample frames.
+    
+    Repeatedly splits the box with the largest (channel range x pixel count)
+    at the weighted median of its widest channel; each box becomes its
+    weighted mean color.
+    
+    Returns:
+        (n, 3) uint8 palette, n <= colors
+    """
+    codes = np.concatenate([rgb555(sample).ravel() for sample in samples])
+    counts = np.bincount(codes, minlength=1 << 15)
+    present = np.flatnonzero(counts)
+    weights = counts[present].astype(np.float64)
+    rgb = np.stack([(present >> 10) & 31, (present >> 5) & 31, present & 31], axis=1) * 8 + 4
+    
+    def score(box):
+        if len(box) < 2:
+            return 0.0, 0
+        span = rgb[box].max(axis=0) - rgb[box].min(axis=0)
+        axis = int(span.argmax())
+        return float(span[axis]) * weights[box].sum(), axis
+    
+    boxes = [(*score(np.arange(len(present))), np.arange(len(present)))]
+    while len(boxes) < colors:
+        i = max(range(len(boxes)), key=lambda j: boxes[j][0])
+        best, axis, box = boxes[i]
+        if best == 0:
+            break  # Every box is a single color
+        box = box[np.argsort(rgb[box, axis], kind="stable")]
+        cumulative = np.cumsum(weights[box])
+        cut = int(np.searchsorted(cumulative, cumulative[-1] / 2)) + 1
+        cut = min(max(cut, 1), len(box) - 1)
+        boxes[i] = (*score(box[:cut]), box[:cut])
+        boxes.append((*score(box[cut:]), box[cut:]))
+    
+    return np.array([
+        np.round((rgb[box] * weights[box, None]).sum(axis=0) / weights[box].sum())
+        for _, _, box in boxes
+    ], dtype=np.uint8)
+
+
+def palette_lut(palette: np.ndarray) -> np.ndarray:
+    """Nearest palette index for every RGB555 code (a 32768-entry lookup table)."""
+    codes = np.arange(1 << 15)
+    centers = np.stack([(codes >> 10) & 31, (codes >> 5) & 31, codes & 31], axis=1) * 8 + 4
+    centers = centers.astype(np.float32)
+    pal = palette.astype(np.float32)
+    # |c - p|^2 = |c|^2 - 2 c.p + |p|^2; |c|^2 is the same for every p
+    distance = (pal * pal).sum(axis=1)[None, :] - 2 * centers @ pal.T
+    return distance.argmin(axis=1).astype(np.uint8)
+
+
+def palette_error(samples: List[np.ndarray], palette: np.ndarray) -> float:
+    """RMS error, in 8-bit levels, of mapping the samples to their nearest palette colors."""
+    lut = palette_lut(palette)
+    total, count = 0.0, 0
+    for sample in samples:
+        diff = palette[lut[rgb555(sample)]].astype(np.float32) - sample
+        total += float((diff * diff).sum())
+        count += diff.size
+    return (total / count) ** 0.5 if count else 0.0
+
+
+def load_palette(path: str) -> np.ndarray:
+    """The opaque colors of an ffmpeg palettegen image, as an (n, 3) uint8 palette."""
+    with Image.open(path) as im:
+        rgba = np.asarray(im.convert("RGBA")).reshape(-1, 4)
+    return np.unique(rgba[rgba[:, 3] >= 128, :3], axis=0)
+
+
+def sample_video_frames(path: str, width: int, height: int, duration: float,
+                        count: int = PALETTE_KEYFRAMES) -> List[np.ndarray]:
+    """
+    count evenly spaced frames of a width x height video file lasting
+    duration seconds, shrunk by PALETTE_SAMPLE_STRIDE.
+    
+    One ffmpeg pass picks and shrinks them, so only the small frames reach
+    Python and the cost barely depends on the video's length.
+    """
+    width, height = -(-width // PALETTE_SAMPLE_STRIDE), -(-height // PALETTE_SAMPLE_STRIDE)
+    data = subprocess.run([
+        "ffmpeg", "-i", path,
+        "-vf", f"fps={count}/{max(duration, 0.001):.3f},scale={width}:{height}:flags=neighbor",
+        "-frames:v", str(count), "-f", "rawvideo", "-pix_fmt", "rgb24", "-"
+    ], capture_output=True, check=True).stdout
+    frames = np.frombuffer(data, dtype=np.uint8)
+    frame_size = width * height * 3
+    return list(frames[:len(frames) // frame_size * frame_size].reshape(-1, height, width, 3))
+
+
+def save_palette(palette: np.ndarray, path: str):
+    """
+    Write a palette as an ffmpeg palette image: 16x16 RGBA, padded with the
+    last color, final entry transparent (the layout palettegen produces).
+    """
+    entries = np.zeros((256, 4), dtype=np.uint8)
+    entries[:len(palette), :3] = palette[:255]
+    entries[len(palette):, :3] = palette[-1]
+    entries[:, 3] = 255
+    entries[255] = (0, 255, 0, 0)
+    Image.fromarray(entries.reshape(16, 16, 4), "RGBA").save(path)
+
+
+def sampled_palette(samples: List[np.ndarray], holdout: List[np.ndarray], colors: int) -> Optional[np.ndarray]:
+    """
+    Median-cut palette from sampled frames, if it generalizes.
+    
+    The palette is checked on held-out frames (e.g. the ones between the
+    samples): if those quantize more than PALETTE_HOLDOUT_TOLERANCE worse
+    than the samples themselves, the samples missed part of the content
+    and None is returned.
+    
+    Returns:
+        (n, 3) uint8 palette with at most colors - 1 entries (one is left
+        for transparency), or None
+    """
+    palette = median_cut_palette(samples, colors - 1)
+    if palette_error(holdout, palette) > palette_error(samples, palette) * (1 + PALETTE_HOLDOUT_TOLERANCE):
+        return None
+    return palette
+
+
+class NumpyGifWriter:
+    """
+    Streaming GIF89a writer against one global palette.
+    
+    Each frame is dithered and mapped through a precomputed RGB555 lookup
+    table, then diffed against the previous frame: only the bounding box of
+    changed pixels is stored, with unchanged pixels inside it transparent
+    (disposal "leave in place"). Frames with no change just extend the
+    previous frame's delay.
+    """
+
+    def __init__(self, output_path: str, palette: np.ndarray, dither: int = GIF_BAYER_STRENGTH):
+        self.lut = palette_lut(palette)
+        self.transparent = len(palette)
+        self.table_bits = max(1, int(np.ceil(np.log2(len(palette) + 1))))
+        self.table = np.zeros((1 << self.table_bits, 3), dtype=np.uint8)
+        self.table[:len(palette)] = palette
+        self.dither = dither
+        self.file = open(output_path, "wb")
+        self.size = None
+        self.bayer = None
+        self.prev = None
+        self.pending = None   # (encoded image block, has transparency) awaiting its delay
+        self.time = 0.0       # Seconds of animation added so far
+        self.written_cs = 0   # Centiseconds of delay already written
+        self.kept = 0
+        self.dropped = 0
+
+    def _header(self, width: int, height: int):
+        self.file.write(b"GIF89a" + width.to_bytes(2, "little") + height.to_bytes(2, "little"))
+        # Global color table present, 8-bit color resolution, table size
+        self.file.write(bytes([0xF0 | (self.table_bits - 1), 0, 0]))
+        self.file.write(self.table.tobytes())
+        # NETSCAPE2.0 application extension: loop forever
+        self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def _quantize(self, frame: np.ndarray) -> np.ndarray:
+        if self.dither:
+            frame = np.clip(frame + self.bayer, 0, 255).astype(np.uint8)
+        return self.lut[rgb555(frame)]
+
+    def add(self, frame: np.ndarray, duration: float):
+        """Append an RGB uint8 frame shown for duration seconds."""
+        if self.size is None:
+            height, width = frame.shape[:2]
+            self.size = (width, height)
+            reps = (height // 4 + 1, width // 4 + 1)
+            self.bayer = (np.tile(BAYER_4X4, reps)[:height, :width, None] * self.dither).astype(np.int16)
+            self._header(width, height)
+        
+        indices = self._quantize(frame)
+        if self.prev is None:
+            x, y, block, has_transparency = 0, 0, indices, False
+        else:
+            changed = indices != self.prev
+            rows = np.flatnonzero(changed.any(axis=1))
+            if rows.size == 0:
+                self.time += duration
+                self.dropped += 1
+                return
+            cols = np.flatnonzero(changed.any(axis=0))
+            y, x = int(rows[0]), int(cols[0])
+            y1, x1 = int(rows[-1]) + 1, int(cols[-1]) + 1
+            block = np.where(changed[y:y1, x:x1], indices[y:y1, x:x1], self.transparent).astype(np.uint8)
+            has_transparency = not changed[y:y1, x:x1].all()
+        
+        self._flush()
+        self.pending = (b"".join(GifImagePlugin.getdata(Image.fromarray(block), offset=(x, y))),
+                        has_transparency)
+        self.prev = indices
+        self.time += duration
+        self.kept += 1
+
+    def _flush(self):
+        if self.pending is None:
+            return
+        data, has_transparency = self.pending
+        delay = round(self.time * 100) - self.written_cs
+        self.written_cs += delay
+        # Graphic control extension: disposal 1 (leave in place), optional transparency
+        flags = (1 << 2) | int(has_transparency)
+        self.file.write(bytes([0x21, 0xF9, 4, flags]) + min(delay, 0xFFFF).to_bytes(2, "little")
+                        + bytes([self.transparent if has_transparency else 0, 0]))
+        self.file.write(data)
+        self.pending = None
+
+    def close(self):
+        """Write the last frame and the trailer."""
+        try:
+            self._flush()
+            if self.size is not None:
+                self.file.write(b"\x3B")
+        finally:
+            self.file.close()
+
+
+# ============================================================
+# GIF GENERATION FUNCTIONS
+# ============================================================
+
+# Scrolls inside the page on a requestAnimationFrame timeline: one wheel step
+# is due every delayMs of elapsed frame time, so the scroll speed does not
+# depend on IPC latency or host load. Resolves once, when the scroll is done.
+SCROLL_DRIVER_JS = """
+(opts) => new Promise((resolve) => {
+    const root = document.scrollingElement || document.documentElement;
+    const maxScroll = () => Math.max(0, root.scrollHeight - window.innerHeight);
+    const down = opts.direction > 0;
+    const distance = down ? maxScroll() - window.scrollY : window.scrollY;
+    const totalSteps = Math.floor(Math.max(0, distance) / opts.step) + 1;
+    const cx = window.innerWidth / 2, cy = window.innerHeight / 2;
+    const state = window.__siteGifferScroll = {done: false, steps: 0};
+    let start = null;
+
+    const fireStep = () => {
+        const delta = down ? opts.step : -opts.step;
+        const target = document.elementFromPoint(cx, cy) || document.body;
+        const wheel = new WheelEvent('wheel', {
+            deltaY: delta, deltaMode: 0, clientX: cx, clientY: cy,
+            bubbles: true, cancelable: true, composed: true, view: window,
+        });
+        // Smooth-scroll libraries (Lenis, GSAP ScrollSmoother) consume the wheel
+        // event and call preventDefault(); otherwise scroll natively, since
+        // synthetic wheel events have no default action.
+        if (target.dispatchEvent(wheel)) {
+            window.scrollBy({top: delta, behavior: 'instant'});
+        }
+        state.steps++;
+    };
+    const reachedEnd = () => down ? window.scrollY >= maxScroll() - 10 : window.scrollY <= 10;
+    const finish = (now) => {
+        if (!down) window.scrollTo({top: 0, behavior: 'instant'});
+        setTimeout(() => {
+            state.done = true;
+            resolve({steps: state.steps, duration_ms: now - start, scroll_y: window.scrollY});
+        }, opts.holdMs);
+    };
+    const tick = (now) => {
+        if (start === null) start = now;
+        const due = Math.min(totalSteps, Math.floor((now - start) / opts.delayMs) + 1);
+        while (state.steps < due) fireStep();
+        if (state.steps >= totalSteps || reachedEnd()) return finish(now);
+        requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+})
+"""
+
+
+def scroll_driver_options(direction: int, scroll_step: int, delay: float, hold: float) -> dict:
+    """Arguments for SCROLL_DRIVER_JS."""
+    return {
+        "direction": direction,
+        "step": scroll_step,
+        "delayMs": delay * 1000,
+        "holdMs": hold * 1000,
+    }
+
+
+def run_scroll_driver(page, direction: int, scroll_step: int, delay: float, hold: float) -> dict:
+    """
+    Run SCROLL_DRIVER_JS and block until the in-page scroll finishes.
+    
+    Returns:
+        {"steps", "duration_ms", "scroll_y"} as reported by the page
+    """
+    return page.evaluate(SCROLL_DRIVER_JS, scroll_driver_options(direction, scroll_step, delay, hold))
+
+
+def smooth_scroll_down(page, scroll_step=80, delay=0.04):
+    """Scroll smoothly to the bottom of the page."""
+    return run_scroll_driver(page, 1, scroll_step, delay, hold=0.3)
+
+
+def smooth_scroll_up(page, scroll_step=80, delay=0.04):
+    """Scroll smoothly back to the top of the page for seamless loop."""
+    # Ends exactly at top (no flash)
+    return run_scroll_driver(page, -1, scroll_step, delay, hold=0.2)
+
+
+def run_ffmpeg(cmd: List[str], frames=None) -> int:
+    """
+    Run an ffmpeg command, optionally streaming raw RGB frames into its stdin.
+    
+    Returns:
+        Number of frames streamed (0 without frames)
+    
+    Raises:
+        subprocess.CalledProcessError if ffmpeg fails, FileNotFoundError if missing
+    """
+    if frames is None:
+        subprocess.run(cmd, capture_output=True, check=True)
+        return 0
+    
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    count = 0
+    try:
+        for frame in frames:
+            proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+            count += 1
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; its return code tells why
+    finally:
+        proc.stdin.close()
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return count
+
+
+WORKSPACE_TMPFS = "/dev/shm"          # RAM-backed scratch space, when available
+WORKSPACE_MIN_TMPFS_FREE_MB = 1024    # Use tmpfs only if at least this much is free
+
+
+_workspaces_swept = False  # sweep_stale_workspaces() runs once per process
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def sweep_stale_workspaces():
+    """Remove workspaces whose owning process is gone (killed or OOM-killed jobs)."""
+    for root in (WORKSPACE_TMPFS, tempfile.gettempdir()):
+        try:
+            names = os.listdir(root)
+        except OSError:
+            continue
+        for name in names:
+            match = re.fullmatch(r"sitegiffer_(\d+)_.*", name)
+            if match and not pid_alive(int(match.group(1))):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def make_workspace() -> str:
+    """
+    Create a private scratch directory for one job's intermediates.
+    
+    Prefers tmpfs (/dev/shm) when it has enough free space, otherwise the
+    system temp dir. The caller removes it with shutil.rmtree when done;
+    the owner's pid in the name lets the first call of a later process
+    sweep what a killed job left behind.
+    """
+    global _workspaces_swept
+    if not _workspaces_swept:
+        _workspaces_swept = True
+        sweep_stale_workspaces()
+    
+    root = None
+    try:
+        if shutil.disk_usage(WORKSPACE_TMPFS).free / (1024 * 1024) >= WORKSPACE_MIN_TMPFS_FREE_MB:
+            root = WORKSPACE_TMPFS
+    except OSError:
+        pass
+    return tempfile.mkdtemp(prefix=f"sitegiffer_{os.getpid()}_", dir=root)
+
+
+class PhaseTimer:
+    """Accumulate wall time per pipeline phase into a job report dict."""
+
+    def __init__(self, report: dict):
+        self.timings = report.setdefault("timings", {})
+        self._last = time.monotonic()
+
+    def mark(self, phase: str):
+        """Charge the time since the previous mark to phase."""
+        now = time.monotonic()
+        self.timings[phase] = round(self.timings.get(phase, 0.0) + now - self._last, 3)
+        self._last = now
+
+
+def frame_input(preset: Preset, concat_path: Optional[str] = None,
+                renderer: Optional[StaticScrollRenderer] = None) -> Tuple[List[str], Optional[Callable]]:
+    """
+    ffmpeg input arguments for a single-navigation capture.
+    
+    Returns:
+        (input_args, frame_source) - frame_source() yields raw frames to pipe
+        into stdin for static captures, and is None for ffconcat inputs
+    """
+    if renderer is not None:
+        input_args = [
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{VIEWPORT['width']}x{VIEWPORT['height']}",
+            "-framerate", str(preset.fps), "-i", "-"
+        ]
+        # Frames are re-synthesized (and re-trimmed) for each ffmpeg pass - cheaper than storing them
+        return input_args, lambda: ContentTrimmer().frames(
+            renderer.frames(preset.fps, preset.scroll_step, preset.scroll_delay))
+    return ["-f", "concat", "-i", concat_path], None
+
+
+GIF_WIDTH = 1260
+GIF_DITHER = "bayer:bayer_scale=5"
+
+# Drops frames that differ from the last kept one by less than a perceptual
+# threshold (per 8x8 block: any block over hi, or more than frac of blocks over
+# lo, keeps the frame); the kept frame's GIF delay grows to cover the run
+FRAME_DEDUP = "mpdecimate=hi=768:lo=320:frac=0.33"
+
+# Palette modes
+PALETTE_GLOBAL = "global"      # One palette for the whole GIF; applied once all frames are in
+PALETTE_PER_FRAME = "frame"    # Palette per frame; every frame is GIF-encoded as soon as it arrives
+
+
+def trim_filter(trim_end: Optional[float]) -> str:
+    """Frame-accurate cut at trim_end seconds (empty when not trimming)."""
+    if trim_end is None:
+        return ""
+    return f"trim=end={max(0.0, trim_end):.3f},setpts=PTS-STARTPTS,"
+
+
+@dataclass
+class EncodeSettings:
+    """Encode-side knobs (as opposed to the capture side of a Preset)."""
+    width: int
+    fps: int
+    colors: int
+    dither: str
+    
+    @classmethod
+    def from_preset(cls, preset: Preset) -> "EncodeSettings":
+        return cls(width=GIF_WIDTH, fps=preset.fps, colors=preset.colors, dither=GIF_DITHER)
+
+
+def gif_scale(width: int) -> str:
+    return f"scale={width}:-1:flags=lanczos"
+
+
+def gif_height(width: int) -> int:
+    """Frame height gif_scale(width) produces from a VIEWPORT-sized capture (rounded like ffmpeg)."""
+    return (width * VIEWPORT["height"] * 2 + VIEWPORT["width"]) // (2 * VIEWPORT["width"])
+
+
+def gif_filtergraph(preset: Preset, trim_end: Optional[float] = None,
+                    palette_mode: str = PALETTE_GLOBAL,
+                    settings: Optional[EncodeSettings] = None) -> str:
+    """
+    Single-pass GIF filtergraph: decode, trim and scale once, then split
+    into palettegen (stats) and paletteuse (output) branches.
+    
+    Runs of identical or near-identical frames (preloader idle, the hold at
+    the bottom) are merged by FRAME_DEDUP before scaling, so they cost one
+    frame with a longer delay instead of one frame per tick.
+    
+    With PALETTE_PER_FRAME, palettegen emits a palette for every frame and
+    paletteuse applies it right away, so encoding fully overlaps capture.
+    
+    settings overrides the preset's fps/colors and the default width/dither.
+    """
+    settings = settings or EncodeSettings.from_preset(preset)
+    return (
+        f"{trim_filter(trim_end)}fps={settings.fps},{FRAME_DEDUP},{gif_scale(settings.width)},"
+        f"{palette_chain(settings, palette_mode)}"
+    )
+
+
+def palette_chain(settings: EncodeSettings, palette_mode: str = PALETTE_GLOBAL) -> str:
+    """The split -> palettegen / paletteuse tail of a GIF filtergraph."""
+    if palette_mode == PALETTE_PER_FRAME:
+        stats, use = "stats_mode=single", ":new=1"
+    else:
+        stats, use = "stats_mode=diff", ""
+    return (
+        f"split[a][b];"
+        f"[a]palettegen=max_colors={settings.colors}:{stats}[p];"
+        f"[b][p]paletteuse=dither={settings.dither}:diff_mode=rectangle{use}"
+    )
+
+
+def build_gif_command(input_args: List[str], preset: Preset, output_path: str,
+                      trim_end: Optional[float] = None,
+                      palette_mode: str = PALETTE_GLOBAL) -> List[str]:
+    """
+    The single-pass ffmpeg command that turns the capture input into the GIF.
+    
+    trim_end cuts the input at that many seconds, in the filtergraph, so no
+    ffprobe call or trimmed intermediate file is needed.
+    """
+    return [
+        "ffmpeg", "-y", *input_args,
+        "-filter_complex", gif_filtergraph(preset, trim_end, palette_mode),
+        output_path
+    ]
+
+
+def format_output_args(fmt: str, preset: Preset) -> List[str]:
+    """ffmpeg encoder arguments for one non-GIF output format."""
+    if fmt == FORMAT_WEBP:
+        return ["-c:v", "libwebp_anim", "-quality", str(preset.webp_quality), "-loop", "0"]
+    if fmt == FORMAT_MP4:
+        return ["-c:v", "libx264", "-crf", str(preset.mp4_crf), "-preset", "medium",
+                "-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+    if fmt == FORMAT_APNG:
+        return ["-c:v", "apng", "-plays", "0", "-f", "apng"]
+    raise ValueError(f"Unknown output format '{fmt}'")
+
+
+def parse_formats(text: str) -> List[str]:
+    """Parse a comma-separated format list such as "webp,mp4"."""
+    formats = [fmt.strip().lower() for fmt in str(text).split(",") if fmt.strip()]
+    for fmt in formats:
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown output format '{fmt}' (use {', '.join(FORMAT_EXTENSIONS)})")
+    return formats
+
+
+def format_outputs(output_path: str, formats: List[str]) -> dict:
+    """{format: path} for the non-GIF formats, sharing the GIF's stem."""
+    stem = os.path.splitext(output_path)[0]
+    return {fmt: stem + FORMAT_EXTENSIONS[fmt] for fmt in formats if fmt != FORMAT_GIF}
+
+
+def parse_widths(text: str) -> List[int]:
+    """Parse a comma-separated width ladder such as "1260,840,420"."""
+    try:
+        widths = [int(width) for width in str(text).split(",") if width.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid width list '{text}'")
+    for width in widths:
+        if not 0 < width <= GIF_WIDTH:
+            raise ValueError(f"Width {width} is outside 1-{GIF_WIDTH}")
+    return widths
+
+
+def ladder_outputs(output_path: str, widths: List[int]) -> dict:
+    """{width: path} for the ladder rungs below GIF_WIDTH, named <stem>_<width>w.gif."""
+    stem, ext = os.path.splitext(output_path)
+    return {width: f"{stem}_{width}w{ext or '.gif'}" for width in sorted(set(widths), reverse=True)
+            if width != GIF_WIDTH}
+
+
+def build_output_command(input_args: List[str], preset: Preset, gif_path: Optional[str], outputs: dict,
+                         trim_end: Optional[float] = None, palette_mode: str = PALETTE_GLOBAL,
+                         rungs: Optional[dict] = None) -> List[str]:
+    """
+    One ffmpeg for several formats: decode, trim, resample and scale once,
+    then split into the GIF branch (unless gif_path is None) and one branch
+    per entry of outputs, encoded side by side.
+    
+    Only the GIF branch is deduplicated; WebP, MP4 and APNG encoders skip
+    unchanged regions themselves and keep constant frame timing.
+    
+    Each rung ({width: path}, see ladder_outputs) gets its own filtergraph
+    on the same decoded input, with its own palette; ffmpeg runs every
+    filtergraph on its own thread.
+    """
+    branches = ([FORMAT_GIF] if gif_path else []) + list(outputs)
+    graphs, output_args = [], []
+    for width, path in (rungs or {}).items():
+        settings = replace(EncodeSettings.from_preset(preset), width=width)
+        graphs += ["-filter_complex", f"[0:v]{gif_filtergraph(preset, trim_end, palette_mode, settings)}[w{width}]"]
+        output_args += ["-map", f"[w{width}]", path]
+    if not branches:
+        return ["ffmpeg", "-y", *input_args, *graphs, *output_args]
+    
+    labels = "".join(f"[s{i}]" for i in range(len(branches)))
+    # split hands every branch the same pixel format; pin it to RGB so the
+    # MP4 branch's yuv420p conversion stays in that branch
+    graph = [f"[0:v]{trim_filter(trim_end)}fps={preset.fps},{gif_scale(GIF_WIDTH)},format=rgb24,"
+             f"split={len(branches)}{labels}"]
+    for i, fmt in enumerate(branches):
+        if fmt == FORMAT_GIF:
+            graph.append(f"[s{i}]{FRAME_DEDUP},{palette_chain(EncodeSettings.from_preset(preset), palette_mode)}[gif]")
+            output_args += ["-map", "[gif]", gif_path]
+        elif fmt == FORMAT_MP4:
+            # yuv420p needs even dimensions
+            graph.append(f"[s{i}]crop=trunc(iw/2)*2:trunc(ih/2)*2[mp4]")
+            output_args += ["-map", "[mp4]", *format_output_args(fmt, preset), outputs[fmt]]
+        else:
+            output_args += ["-map", f"[s{i}]", *format_output_args(fmt, preset), outputs[fmt]]
+    return ["ffmpeg", "-y", *input_args, "-filter_complex", ";".join(graph), *graphs, *output_args]
+
+
+def write_output_manifest(output_path: str, url: str, preset: Preset, outputs: dict,
+                          rungs: Optional[dict] = None) -> List[dict]:
+    """
+    Write <stem>.outputs.json listing every produced file and its size
+    (ladder rungs carry their width, for building a srcset).
+    
+    Returns:
+        The manifest's file entries
+    """
+    def entry(fmt, path, **extra):
+        return {"format": fmt, "path": path, "bytes": os.path.getsize(path) if os.path.exists(path) else None,
+                **extra}
+    
+    files = [entry(fmt, path) for fmt, path in [(FORMAT_GIF, output_path)] + list(outputs.items())]
+    files += [entry(FORMAT_GIF, path, width=width) for width, path in (rungs or {}).items()]
+    manifest = {"url": url, "preset": preset.name, "files": files}
+    with open(os.path.splitext(output_path)[0] + ".outputs.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return files
+
+
+def gif_delay_offsets(data: bytes) -> Tuple[List[int], int]:
+    """
+    Walk the GIF block structure.
+    
+    Returns:
+        (offsets of each Graphic Control Extension's delay field, image count)
+    """
+    pos = 13
+    flags = data[10]
+    if flags & 0x80:
+        pos += 3 << ((flags & 0x07) + 1)  # Global color table
+    
+    def skip_sub_blocks(pos):
+        while data[pos]:
+            pos += data[pos] + 1
+        return pos + 1
+    
+    offsets, images = [], 0
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x21:  # Extension
+            if data[pos + 1] == 0xF9:
+                offsets.append(pos + 4)
+            pos = skip_sub_blocks(pos + 2)
+        elif block == 0x2C:  # Image descriptor
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:
+                pos += 3 << ((flags & 0x07) + 1)  # Local color table
+            pos = skip_sub_blocks(pos + 1)  # LZW min code size, then image data
+            images += 1
+        else:  # Trailer (0x3B) or garbage
+            break
+    return offsets, images
+
+
+def finalize_gif(output_path: str, duration: float, fps: int, exact: bool = False) -> dict:
+    """
+    Restore the full capture length after frame dedup.
+    
+    mpdecimate cannot extend the last kept frame over a trailing run of
+    duplicates (the end-of-scroll hold), so its delay is stretched here to
+    make the GIF last `duration` seconds. With exact, a last delay that
+    runs past `duration` is shortened as well.
+    
+    Returns:
+        {"kept", "dropped"} frame counts for the job report
+    """
+    with open(output_path, "r+b") as f:
+        data = f.read()
+        offsets, images = gif_delay_offsets(data)
+        if offsets:
+            total = sum(int.from_bytes(data[o:o + 2], "little") for o in offsets[:-1])
+            last = int.from_bytes(data[offsets[-1]:offsets[-1] + 2], "little")
+            wanted = round(duration * 100) - total
+            if wanted > last or (exact and 0 < wanted < last):
+                f.seek(offsets[-1])
+                f.write(min(wanted, 0xFFFF).to_bytes(2, "little"))
+    return {"kept": images, "dropped": max(0, round(duration * fps) - images)}
+
+
+def write_gif_fallback(output_path: str, preset: Preset, source_video: Optional[str] = None,
+                       frame_paths: Optional[List[str]] = None,
+                       frame_durations: Optional[List[float]] = None,
+                       frames: Optional[Callable] = None,
+                       trim_end: Optional[float] = None) -> dict:
+    """
+    GIF writer used when ffmpeg is not available (NumPy encoder).
+    
+    Args:
+        frames: Callable returning a fresh iterator of RGB frames at preset.fps
+                (called twice: palette sampling, then encoding)
+        frame_paths/frame_durations: Captured frame files and their display times
+        source_video: Recorded video, decoded through MoviePy
+        trim_end: Cut the source video at this many seconds
+    
+    Returns:
+        {"kept", "dropped"} frame counts for the job report
+    """
+    interval = 1.0 / preset.fps
+    video = None
+    
+    if frames is not None:
+        samples = even_sample((f[::PALETTE_SAMPLE_STRIDE, ::PALETTE_SAMPLE_STRIDE].copy() for f in frames()),
+                              PALETTE_SAMPLE_FRAMES)
+        timeline = ((frame, interval) for frame in frames())
+    elif frame_paths is not None:
+        def load(index):
+            with Image.open(frame_paths[index]) as im:
+                return np.asarray(im.convert("RGB"))
+        
+        # Resample the irregular screencast timeline onto preset.fps ticks
+        starts = np.concatenate([[0.0], np.cumsum(frame_durations)[:-1]])
+        ticks = np.arange(0.0, max(sum(frame_durations), interval), interval)
+        picks = np.searchsorted(starts, ticks, side="right") - 1
+        samples = [load(i)[::PALETTE_SAMPLE_STRIDE, ::PALETTE_SAMPLE_STRIDE]
+                   for i in even_sample(np.unique(picks), PALETTE_SAMPLE_FRAMES)]
+        
+        def paths_timeline():
+            last, frame = None, None
+            for index in picks:
+                if index != last:
+                    last, frame = index, load(index)
+                yield frame, interval
+        timeline = paths_timeline()
+    else:
+        video = VideoFileClip(source_video)
+        end = min(trim_end, video.duration) if trim_end is not None else video.duration
+        samples = [video.get_frame(t)[::PALETTE_SAMPLE_STRIDE, ::PALETTE_SAMPLE_STRIDE]
+                   for t in np.linspace(0, end, PALETTE_SAMPLE_FRAMES, endpoint=False)]
+        timeline = ((video.get_frame(t), interval) for t in np.arange(0.0, end, interval))
+    
+    # One palette slot is kept for the transparent index of dirty rectangles
+    writer = NumpyGifWriter(output_path, median_cut_palette(samples, preset.colors - 1))
+    try:
+        for frame, duration in timeline:
+            writer.add(frame, duration)
+    finally:
+        writer.close()
+        if video is not None:
+            video.close()
+    return {"kept": writer.kept, "dropped": writer.dropped}
+
+
+class GifJob:
+    """
+    Everything around the capture step of generate_gif / generate_gif_async.
+    
+    Owns the job's workspace and decides how frames are encoded (streamed
+    straight to the GIF, or through a ScaledFrameCache); then encodes what
+    was captured, writes the output manifest and fills the capture cache.
+    All of it is blocking, so the async path runs it with asyncio.to_thread;
+    only driving the browser differs between the two.
+    """
+
+    def __init__(self, url: str, preset: Preset, output_path: str, report: dict,
+                 status_callback: Optional[Callable] = None, palette_mode: str = PALETTE_GLOBAL,
+                 max_bytes: Optional[int] = None, variants: Optional[List[Tuple[Preset, str]]] = None,
+                 capture_cache: Optional["CaptureCache"] = None, formats: Optional[List[str]] = None,
+                 widths: Optional[List[int]] = None, palette_cache: Optional["PaletteCache"] = None,
+                 encode_chunks: Optional[int] = None):
+        self.url = url
+        self.preset = preset
+        self.output_path = output_path
+        self.report = report
+        self.timer = PhaseTimer(report)
+        self.status_callback = status_callback
+        self.palette_mode = palette_mode
+        self.max_bytes = max_bytes
+        self.variants = variants
+        self.capture_cache = capture_cache
+        self.formats = formats
+        self.widths = widths
+        self.palettes = palette_cache.for_site(url) if palette_cache is not None else None
+        self.encode_chunks = encode_chunks or GIF_ENCODE_CHUNKS
+        # Every intermediate (frames, video, palette) lives in this job's own
+        # workspace, so concurrent jobs can't clobber each other
+        self.workspace = make_workspace()
+        # Variants are captured once, at the highest fps any of them needs
+        self.capture_fps = max([preset.fps] + [p.fps for p, _ in variants or []])
+        self.capture_key = None
+        self.cache = None
+        self.capture_preset = preset
+        self.encoder = None
+        self.trimmer = None
+        self.duration = None
+
+    def status(self, msg: str):
+        if self.status_callback:
+            self.status_callback(msg)
+
+    def replay_cached(self, capture_mode: str) -> bool:
+        """
+        Produce every output from the capture cache, if it holds this page.
+        
+        On a miss (or without a cache) this plans the capture instead:
+        capture_preset and cache are set for the recording that follows.
+        
+        Returns:
+            True if the outputs were written from the cache
+        """
+        if self.capture_cache is not None:
+            self.capture_key = self.capture_cache.key(self.url, self.preset, capture_mode)
+            entry = self.capture_cache.lookup(self.capture_key, self.capture_fps)
+            self.report["capture_cache"] = "hit" if entry else "miss"
+            if entry is not None:
+                self.status("♻️ Reusing cached capture...")
+                replay_capture(entry, self.preset, self.output_path, self.report, self.workspace,
+                               self.max_bytes, self.variants, self.status, self.formats, self.widths,
+                               self.palettes, self.encode_chunks)
+                self._write_manifest()
+                self.timer.mark("encode")
+                self.status("✅ Done!")
+                return True
+            self.capture_fps = max(self.capture_fps, CAPTURE_CACHE_FPS)
+        
+        # A stored palette is only worth the decoded-frame detour when there is one
+        if (self.max_bytes or self.variants or self.capture_cache is not None
+                or (self.palettes is not None and self.palettes.has_entry(self.preset))):
+            self.cache = ScaledFrameCache(self.workspace, self.capture_fps)
+            self.capture_preset = replace(self.preset, fps=self.cache.fps)
+        return False
+
+    def page_ready(self, ready: bool, waited: float, reason: str):
+        """Record the outcome of wait_for_page_ready()."""
+        self.report.update(page_ready=ready, preloader_wait=round(waited, 3), ready_reason=reason)
+        self.status(f"⏳ Page ready after {waited:.1f}s ({reason})")
+        self.timer.mark("preloader")
+
+    def auto_capture_mode(self, safe: bool, reasons: List[str]) -> str:
+        """Resolve CAPTURE_AUTO from static_capture_safe()'s verdict."""
+        capture_mode = CAPTURE_STATIC if safe else CAPTURE_SCREENCAST
+        self.report["static_unsafe_reasons"] = reasons
+        self.status(f"🎥 Capture mode: {capture_mode} {' '.join(reasons)[:24]}")
+        return capture_mode
+
+    def start_encoder(self, capture_mode: str) -> Optional["StreamingEncoder"]:
+        """
+        Streaming encoder for the recorder to feed, when ffmpeg is available;
+        frame files are only written for the NumPy fallback.
+        """
+        if capture_mode not in (CAPTURE_STATIC, CAPTURE_VIDEO) and shutil.which("ffmpeg"):
+            self.trimmer = ContentTrimmer()
+            self.encoder = StreamingEncoder(
+                capture_command(pipe_input_args(self.capture_preset.fps), self.preset, self.output_path,
+                                palette_mode=self.palette_mode, cache=self.cache,
+                                formats=self.formats, widths=self.widths),
+                stages=[self.trimmer.stage()])
+        return self.encoder
+
+    def finish(self, capture_mode: str, recorder=None, renderer: Optional[StaticScrollRenderer] = None,
+               concat_path: Optional[str] = None, video_path: Optional[str] = None,
+               trim_end: Optional[float] = None) -> bool:
+        """
+        Turn the capture into the GIF and every other output, then cache it.
+        
+        Returns:
+            False if nothing was captured
+        """
+        if capture_mode == CAPTURE_VIDEO:
+            if not os.path.exists(video_path):
+                return False
+        elif renderer is None and recorder.frame_count == 0:
+            return False
+        
+        self.status("🎨 Converting to GIF...")
+        
+        if self.encoder is not None:
+            # Frames were encoded while capturing - only the tail is left
+            self.status("🔧 Optimizing GIF...")
+            self.encoder.close()
+            self.report["pipeline"] = self.encoder.stats()
+            self.report["trim"] = self.trimmer.stats()
+            self.duration = self.encoder.frames_written / self.capture_preset.fps
+            self.encoder = None
+            self._finish_gif()
+        else:
+            if capture_mode != CAPTURE_VIDEO:
+                input_args, frame_source = frame_input(self.capture_preset, concat_path, renderer)
+            else:
+                frame_source = None
+                input_args = ["-i", video_path]
+            
+            # Convert using ffmpeg for best quality/size ratio
+            try:
+                self.status("🔧 Optimizing GIF...")
+                piped = run_ffmpeg(capture_command(input_args, self.preset, self.output_path, trim_end,
+                                                   cache=self.cache, formats=self.formats, widths=self.widths),
+                                   frame_source and frame_source())
+                
+                if capture_mode == CAPTURE_VIDEO:
+                    self.duration = trim_end
+                elif frame_source is not None:
+                    self.duration = piped / self.capture_preset.fps
+                else:
+                    self.duration = sum(recorder.frame_durations)
+                self._finish_gif()
+                
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                # Fallback to the NumPy encoder, one GIF per preset
+                sources = (capture_mode, recorder, renderer, video_path, trim_end)
+                primary = self._write_fallback(*sources, self.preset, self.output_path)
+                self.report["frames"] = primary["frames"]
+                if self.variants:
+                    results = [self._write_fallback(*sources, preset, path) for preset, path in self.variants]
+                    # As in finish_gif(), the primary leads the table unless it was a size-targeted encode
+                    self.report["variants"] = results if self.max_bytes else [primary] + results
+        self._write_manifest()
+        self.timer.mark("encode")
+        
+        self._store_capture()
+        self.status("✅ Done!")
+        return True
+
+    def _write_fallback(self, capture_mode: str, recorder, renderer: Optional[StaticScrollRenderer],
+                        video_path: Optional[str], trim_end: Optional[float], preset: Preset,
+                        output_path: str) -> dict:
+        """
+        NumPy-encode one preset's GIF from the capture.
+        
+        Returns:
+            Result dict shaped like encode_variant()'s
+        """
+        start = time.monotonic()
+        if capture_mode == CAPTURE_STATIC:
+            # Synthesized again at this preset's own fps, not the cache's capture fps
+            frames = write_gif_fallback(output_path, preset, frames=frame_input(preset, None, renderer)[1])
+        elif capture_mode != CAPTURE_VIDEO:
+            frames = write_gif_fallback(output_path, preset, frame_paths=recorder.frame_paths,
+                                        frame_durations=recorder.frame_durations)
+        else:
+            frames = write_gif_fallback(output_path, preset, source_video=video_path, trim_end=trim_end)
+        return {
+            "preset": preset.name,
+            "output": output_path,
+            "fps": preset.fps,
+            "colors": preset.colors,
+            "bytes": os.path.getsize(output_path),
+            "frames": frames,
+            "palette": None,
+            "seconds": round(time.monotonic() - start, 2),
+        }
+
+    def _finish_gif(self):
+        finish_gif(self.output_path, self.preset, self.duration, self.report, self.max_bytes, self.cache,
+                   self.status, self.variants, self.formats, self.widths, self.palettes, self.encode_chunks)
+
+    def _write_manifest(self):
+        if self.formats or self.widths:
+            self.report["outputs"] = write_output_manifest(self.output_path, self.url, self.preset,
+                                                           format_outputs(self.output_path, self.formats or []),
+                                                           ladder_outputs(self.output_path, self.widths or []))
+
+    def _store_capture(self):
+        if self.capture_cache is None or self.duration is None:
+            return
+        if not cacheable_capture(self.report):
+            # A timed-out preloader or hung request would be replayed on every run
+            self.report["capture_cache"] = "not stored (page not settled)"
+            return
+        self.status("💾 Caching capture...")
+        try:
+            self.capture_cache.store(self.capture_key, self.cache.paths[GIF_WIDTH], self.cache.fps,
+                                     self.duration, self.report)
+        except (subprocess.CalledProcessError, OSError):
+            self.report["capture_cache"] = "store failed"
+        self.timer.mark("cache")
+
+    def close(self):
+        """Stop a streaming encoder that was not finished and remove the workspace."""
+        if self.encoder is not None:
+            self.encoder.abort()
+            self.encoder = None
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+
+def generate_gif(url: str, preset: Preset, output_path: str, status_callback: Optional[Callable] = None,
+                 pool: Optional[BrowserPool] = None, capture_mode: str = CAPTURE_SCREENCAST,
+                 report: Optional[dict] = None, palette_mode: str = PALETTE_GLOBAL,
+                 max_bytes: Optional[int] = None,
+                 variants: Optional[List[Tuple[Preset, str]]] = None,
+                 capture_cache: Optional["CaptureCache"] = None,
+                 formats: Optional[List[str]] = None,
+                 widths: Optional[List[int]] = None,
+                 palette_cache: Optional["PaletteCache"] = None,
+                 encode_chunks: Optional[int] = None) -> bool:
+    """
+    Generate a seamless looping GIF from a website URL.
+    
+    The GIF scrolls down and then back up smoothly for perfect looping.
+    Recording starts AFTER preloader finishes.
+    
+    Args:
+        url: Target website URL
+        preset: Configuration preset
+        output_path: Output GIF file path
+        status_callback: Optional callback function for status updates
+        pool: Optional warm BrowserPool to borrow a browser from. When omitted
+              a private single-browser pool is started and closed for this call.
+        capture_mode: CAPTURE_SCREENCAST (load once, record the same page),
+                      CAPTURE_VIRTUAL (same, but frame-stepped on a paused clock),
+                      CAPTURE_STATIC (synthetic scroll from one full-page screenshot),
+                      CAPTURE_AUTO (static when static_capture_safe() agrees) or
+                      CAPTURE_VIDEO (legacy two-navigation webm recording)
+        report: Optional dict filled with per-phase timings and capture details
+                (including pipeline stage occupancy for streamed captures)
+        palette_mode: PALETTE_GLOBAL (one palette) or PALETTE_PER_FRAME (encode
+                      each frame while capturing, at some cost in file size)
+        max_bytes: Optional size budget; fps/colors/width/dither are searched
+                   to fit it (see encode_to_target, needs ffmpeg)
+        variants: Optional extra (preset, output_path) GIFs encoded in parallel
+                  from the same capture; only their fps/colors apply
+        capture_cache: Optional CaptureCache; a hit skips the browser entirely,
+                       a miss stores this capture for the next run (needs ffmpeg).
+                       A miss captures at CAPTURE_CACHE_FPS into decoded
+                       frames, so the GIF is encoded after capture ends
+                       instead of streamed - callers opt in
+        formats: Optional extra output formats (FORMAT_WEBP, FORMAT_MP4, FORMAT_APNG)
+                 encoded from the same decode next to output_path, listed with
+                 their sizes in <stem>.outputs.json (needs ffmpeg)
+        widths: Optional resolution ladder; every width below GIF_WIDTH is
+                written as <stem>_<width>w.gif with its own palette, from the
+                same decode, and listed in <stem>.outputs.json (needs ffmpeg)
+        palette_cache: Optional PaletteCache; GIFs reuse this site's palette
+                       while it still fits, skipping palettegen (needs ffmpeg).
+                       Plain jobs only leave the streaming encode when a
+                       palette is already stored; any decoded-frame encode
+                       (cache, target, variants) stores one.
+        encode_chunks: Parallel ffmpeg chunk encodes per GIF made from
+                       decoded frames (default GIF_ENCODE_CHUNKS); lower it
+                       when several jobs share the machine
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    def update_status(msg):
+        if status_callback:
+            status_callback(msg)
+    
+    report = report if report is not None else {}
+    own_pool = pool is None
+    job = None
+    recorder = None
+    renderer = None
+    concat_path = None
+    video_path = None
+    trim_end = None
+    
+    try:
+        update_status("🚀 Initializing browser...")
+        
+        if own_pool:
+            pool = BrowserPool(size=1, max_jobs=0, max_rss_mb=None)
+        
+        job = GifJob(url, preset, output_path, report, status_callback, palette_mode, max_bytes, variants,
+                     capture_cache, formats, widths, palette_cache, encode_chunks)
+        if job.replay_cached(capture_mode):
+            return True
+        capture_preset = job.capture_preset
+        
+        with pool.browser() as browser:
+            job.timer.mark("browser")
+            
+            if capture_mode != CAPTURE_VIDEO:
+                # ============================================================
+                # SINGLE NAVIGATION: load + preloader, then record same page
+                # ============================================================
+                update_status("🌐 Loading page...")
+                
+                context = browser.new_context(viewport=VIEWPORT)
+                page = context.new_page()
+                report["network"] = goto_and_settle(page, url)
+                job.timer.mark("load")
+                
+                update_status(f"⏳ Waiting for preloader (max {preset.preloader_wait}s)...")
+                job.page_ready(*wait_for_page_ready(page, preset.preloader_wait))
+                
+                if capture_mode == CAPTURE_AUTO:
+                    capture_mode = job.auto_capture_mode(*static_capture_safe(page))
+                report["capture_mode"] = capture_mode
+                
+                update_status("🎥 Starting recording...")
+                encoder = job.start_encoder(capture_mode)
+                
+                if capture_mode == CAPTURE_STATIC:
+                    update_status("📜 Capturing full page...")
+                    renderer = StaticScrollRenderer(page)
+                    renderer.capture()
+                elif capture_mode == CAPTURE_VIRTUAL:
+                    recorder = VirtualTimeRecorder(page, job.workspace, capture_preset.fps,
+                                                   sink=encoder and encoder.write)
+                    update_status("📜 Scrolling down (virtual time)...")
+                    concat_path = recorder.record_scroll(preset.scroll_step, preset.scroll_delay)
+                else:
+                    recorder = ScreencastRecorder(page, job.workspace,
+                                                  sink=encoder and FrameResampler(capture_preset.fps, encoder.write))
+                    recorder.start()
+                    
+                    update_status("📜 Scrolling down...")
+                    smooth_scroll_down(page, preset.scroll_step, preset.scroll_delay)
+                    
+                    # Stopping the screencast before closing avoids the end flash,
+                    # so no tail trim is needed
+                    concat_path = recorder.stop()
+                page.close()
+                context.close()
+                job.timer.mark("capture")
+            else:
+                # ============================================================
+                # PHASE 1: Load page and wait for preloader (NO recording)
+                # ============================================================
+                update_status("🌐 Loading page (preloader phase)...")
+                
+                context_preload = browser.new_context(viewport=VIEWPORT)
+                page_preload = context_preload.new_page()
+                report["network"] = goto_and_settle(page_preload, url)
+                job.timer.mark("load")
+                
+                update_status(f"⏳ Waiting for preloader (max {preset.preloader_wait}s)...")
+                job.page_ready(*wait_for_page_ready(page_preload, preset.preloader_wait))
+                report["capture_mode"] = capture_mode
+                
+                # Close preload context completely
+                page_preload.close()
+                context_preload.close()
+                
+                # ============================================================
+                # PHASE 2: Fresh recording session (AFTER preloader)
+                # ============================================================
+                update_status("🎥 Starting recording...")
+                
+                # New context with video recording
+                context_record = browser.new_context(
+                    viewport=VIEWPORT,
+                    record_video_dir=job.workspace,
+                    record_video_size=VIEWPORT
+                )
+                
+                page = context_record.new_page()
+                # The video starts with the page; used to place the tail trim
+                record_start = time.monotonic()
+                
+                # Navigate fresh - a new context starts with an empty HTTP cache
+                goto_and_settle(page, url)
+                
+                # Small wait for any animations to settle (but NO long preloader)
+                time.sleep(0.5)
+                
+                # ============================================================
+                # SCROLL: Down and then Up for seamless loop
+                # ============================================================
+                update_status("📜 Scrolling down...")
+                smooth_scroll_down(page, preset.scroll_step, preset.scroll_delay)
+                
+                # Everything after this point (bottom pause + close flash) is
+                # cut inside the encode filtergraph
+                trim_end = time.monotonic() - record_start
+                
+                # Pause at bottom before ending
+                time.sleep(0.3)
+                
+                # Close to save video - do this cleanly to avoid flash
+                video = page.video
+                page.close()
+                context_record.close()
+                # The exact file Playwright wrote for this page (complete once the context closed)
+                video_path = video.path()
+                job.timer.mark("capture")
+        
+        # Release a private browser before the CPU-heavy conversion
+        if own_pool:
+            pool.close()
+        
+        # ============================================================
+        # PHASE 3: Convert video to optimized GIF
+        # ============================================================
+        return job.finish(capture_mode, recorder, renderer, concat_path, video_path, trim_end)
+        
+    except Exception as e:
+        update_status(f"❌ Error: {str(e)[:50]}")
+        return False
+    
+    finally:
+        # Cleanup
+        if job is not None:
+            job.close()
+        if own_pool and pool is not None:
+            pool.close()
+
+
+# ============================================================
+# CHUNKED GIF ENCODE
+# ============================================================
+# paletteuse and GIF LZW run on one core. From a decoded frame cache the
+# palette is built once, then the timeline is cut into chunks that are
+# dithered and encoded by parallel ffmpeg processes against that palette,
+# and the chunks' frame blocks are stitched into one GIF.
+
+GIF_ENCODE_CHUNKS = os.cpu_count() or 1  # Parallel chunk encodes for a single GIF (per process running jobs)
+GIF_CHUNK_MIN_FRAMES = 60  # Shorter chunks cost more (full first frame, extra decode) than they save
+
+
+def gif_chunks(frame_count: int, chunks: int) -> List[Tuple[int, Optional[int]]]:
+    """(start_frame, end_frame) per chunk; the last one is open-ended."""
+    chunks = max(1, min(chunks, frame_count // GIF_CHUNK_MIN_FRAMES))
+    bounds = [frame_count * i // chunks for i in range(chunks)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def concat_gifs(paths: List[str], output_path: str):
+    """
+    Join GIFs encoded against the same palette into one animation.
+    
+    Everything up to the first frame's Graphic Control Extension (screen
+    descriptor, global color table, loop extension) is taken from the first
+    file and must match in the others; the frame blocks of every file then
+    follow in order. Each chunk starts with a full frame, so disposal and
+    transparency never depend on a frame from another chunk.
+    """
+    header, blocks = None, []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        offsets, _ = gif_delay_offsets(data)
+        if not offsets:
+            raise ValueError(f"{path}: no frames to join")
+        start = offsets[0] - 4  # Delay field sits 4 bytes into the extension
+        if header is None:
+            header = data[:start]
+        elif data[:start] != header:
+            raise ValueError(f"{path}: header or palette differs from the first chunk")
+        blocks.append(data[start:-1] if data[-1] == 0x3B else data[start:])
+    with open(output_path, "wb") as f:
+        f.write(header)
+        f.writelines(blocks)
+        f.write(b"\x3b")
+
+
+def palettegen_command(input_args: List[str], settings: EncodeSettings, palette_path: str) -> List[str]:
+    """ffmpeg command writing the palette the single-pass GIF encode would build."""
+    return [
+        "ffmpeg", "-y", *input_args,
+        "-vf", f"fps={settings.fps},{FRAME_DEDUP},{gif_scale(settings.width)},"
+               f"palettegen=max_colors={settings.colors}:stats_mode=diff",
+        palette_path
+    ]
+
+
+def build_palette(input_args: List[str], settings: EncodeSettings, palette_path: str, duration: float,
+                  frames: Optional[List[np.ndarray]] = None) -> str:
+    """
+    Write the palette for encoding input_args (a ScaledFrameCache input).
+    
+    2 x PALETTE_KEYFRAMES evenly spaced frames are sampled (or passed in
+    as frames); the palette is median-cut from every other one and checked
+    on the rest, so its cost does not grow with page length. palettegen
+    over every frame only runs when the held-out check rejects it.
+    
+    Returns:
+        "sampled" or "full"
+    """
+    if frames is None:
+        # ScaledFrameCache inputs are ["-i", path]
+        frames = sample_video_frames(input_args[-1], settings.width, gif_height(settings.width), duration,
+                                     2 * PALETTE_KEYFRAMES)
+    palette = sampled_palette(frames[::2], frames[1::2], settings.colors)
+    if palette is None:
+        run_ffmpeg(palettegen_command(input_args, settings, palette_path))
+        return "full"
+    save_palette(palette, palette_path)
+    return "sampled"
+
+
+def encode_gif(input_args: List[str], preset: Preset, output_path: str, duration: float, workspace: str,
+               settings: Optional[EncodeSettings] = None, chunks: int = 1,
+               palettes: Optional["PaletteCache"] = None) -> Optional[str]:
+    """
+    Encode a GIF from decoded frames (the ScaledFrameCache), in parallel
+    chunks when chunks > 1 and the capture is long enough.
+    
+    The palette is built first, in workspace (build_palette, from sampled
+    frames), and every chunk is dithered against it, so chunked and
+    unchunked GIFs look the same; only a duplicate frame at a chunk start
+    may be kept where one pass would have merged it. Delays still need
+    finalize_gif afterwards.
+    
+    With palettes (a PaletteCache bound to the site), the palette comes
+    from the cache when it still fits the frames.
+    
+    Returns:
+        The palette cache outcome ("hit", "miss", "drift"), None without one
+    """
+    settings = settings or EncodeSettings.from_preset(preset)
+    spans = gif_chunks(round(duration * settings.fps), chunks)
+    stem = os.path.join(workspace, os.path.splitext(os.path.basename(output_path))[0])
+    if palettes is not None:
+        palette_path, outcome = palettes.palette(preset, settings, input_args, workspace, duration)
+    else:
+        palette_path, outcome = f"{stem}_palette.png", None
+        build_palette(input_args, settings, palette_path, duration)
+    
+    def encode_chunk(i: int) -> str:
+        start, end = spans[i]
+        # fps output timestamps count frames, so trimming by pts equals trimming by frame
+        trim = f"start_pts={start}" + (f":end_pts={end}" if end is not None else "")
+        seek = []
+        if start > 0:
+            # The cache is intra-only: jump to the last stored frame before the
+            # chunk instead of decoding from the start, keeping original timestamps
+            seek = ["-ss", f"{(start - 0.5) / settings.fps:.6f}", "-noaccurate_seek", "-copyts"]
+        path = f"{stem}_chunk{i}.gif" if len(spans) > 1 else output_path
+        run_ffmpeg([
+            "ffmpeg", "-y", *seek, *input_args, "-i", palette_path,
+            "-filter_complex",
+            f"[0]fps={settings.fps},trim={trim},{FRAME_DEDUP},"
+            f"{gif_scale(settings.width)}[x];[x][1]paletteuse=dither={settings.dither}:diff_mode=rectangle",
+            path
+        ])
+        if end is not None:
+            # End the last kept frame exactly at the cut; the muxer rounds
+            # timestamps half-up to centiseconds, so the next chunk starts there
+            def centiseconds(frame):
+                return (frame * 200 + settings.fps) // (2 * settings.fps)
+            span = centiseconds(end) - centiseconds(start)
+            finalize_gif(path, span / 100, settings.fps, exact=True)
+        return path
+    
+    # The work happens in the ffmpeg processes; threads only wait on them
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(spans)) as executor:
+        paths = list(executor.map(encode_chunk, range(len(spans))))
+    if len(spans) > 1:
+        concat_gifs(paths, output_path)
+        for path in paths:
+            os.remove(path)
+    os.remove(palette_path)
+    return outcome
+
+
+# ============================================================
+# TARGET SIZE MODE
+# ============================================================
+
+# Quality reductions tried in order by target-size mode, mildest first.
+# fps steps are fractions of the preset fps.
+TARGET_SIZE_STEPS = [
+    ("colors", 192), ("colors", 128), ("dither", "none"), ("fps", 0.75),
+    ("width", 1080), ("colors", 96), ("fps", 0.5), ("width", 900),
+    ("colors", 64), ("width", 720), ("colors", 48), ("width", 540),
+    ("colors", 32), ("width", 420),
+]
+TARGET_MIN_FPS = 4
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a byte budget such as "8MB", "750k", "5MiB" or "1048576".
+    
+    k/M/G are decimal (as upload limits are usually stated), KiB/MiB/GiB
+    binary.
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*(?:([kmg])(i?))?b?\s*", str(text).lower())
+    if not match:
+        raise ValueError(f"Invalid size '{text}'")
+    base = 1024 if match.group(3) else 1000
+    scale = base ** " kmg".index(match.group(2) or " ")
+    return int(float(match.group(1)) * scale)
+
+
+def target_ladder(preset: Preset) -> List[EncodeSettings]:
+    """Encode settings from the preset's own down to the smallest, best first."""
+    current = EncodeSettings.from_preset(preset)
+    ladder = [current]
+    for knob, value in TARGET_SIZE_STEPS:
+        if knob == "fps":
+            value = max(TARGET_MIN_FPS, round(preset.fps * value))
+        if knob == "dither":
+            lowered = value != current.dither
+        else:
+            lowered = value < getattr(current, knob)
+        if lowered:
+            current = replace(current, **{knob: value})
+            ladder.append(current)
+    return ladder
+
+
+class ScaledFrameCache:
+    """
+    Decoded capture frames, kept between target-size attempts.
+    
+    The capture is decoded, trimmed, resampled to the preset fps and
+    deduplicated once into a lossless FFV1 NUT file at full width; narrower
+    widths are scaled from that file on first use. Attempts then only run
+    palette generation, dithering and GIF encoding.
+    """
+
+    def __init__(self, workspace: str, fps: int):
+        self.workspace = workspace
+        self.fps = fps
+        self.paths = {}
+
+    def _path(self, width: int) -> str:
+        return os.path.join(self.workspace, f"frames_{width}.nut")
+
+    @staticmethod
+    def _frame_output(path: str) -> List[str]:
+        # Lossless like raw rgb24 at a fraction of the size, which matters in
+        # a tmpfs workspace shared by every batch worker
+        return ["-c:v", "ffv1", "-f", "nut", path]
+
+    def fill_command(self, input_args: List[str], trim_end: Optional[float] = None) -> List[str]:
+        """ffmpeg command that decodes the capture input into the full-width cache."""
+        self.paths[GIF_WIDTH] = self._path(GIF_WIDTH)
+        return [
+            "ffmpeg", "-y", *input_args,
+            "-vf", f"{trim_filter(trim_end)}fps={self.fps},{FRAME_DEDUP},{gif_scale(GIF_WIDTH)}",
+            *self._frame_output(self.paths[GIF_WIDTH])
+        ]
+
+    def input_args(self, width: int) -> List[str]:
+        """ffmpeg input arguments for frames at the given width."""
+        if width not in self.paths:
+            path = self._path(width)
+            run_ffmpeg(["ffmpeg", "-y", "-i", self.paths[GIF_WIDTH], "-vf", gif_scale(width),
+                        *self._frame_output(path)])
+            self.paths[width] = path
+        return ["-i", self.paths[width]]
+
+
+def encode_to_target(cache: ScaledFrameCache, preset: Preset, output_path: str, max_bytes: int,
+                     duration: float, status_callback: Optional[Callable] = None,
+                     chunks: int = 1, palettes: Optional["PaletteCache"] = None) -> dict:
+    """
+    Encode the best-quality GIF that fits in max_bytes.
+    
+    The preset's own settings are tried first; otherwise target_ladder() is
+    binary-searched for its first rung under the budget. If nothing fits,
+    the smallest rung is kept.
+    Each attempt is encoded in up to `chunks` parallel chunks, with its
+    palette from `palettes` when given.
+    
+    Returns:
+        Report dict: budget, whether it fits, chosen settings, every attempt
+    """
+    ladder = target_ladder(preset)
+    attempts = {}
+    
+    def attempt(rung: int) -> int:
+        settings = ladder[rung]
+        if status_callback:
+            status_callback(f"🎯 Try {settings.width}px {settings.fps}fps {settings.colors}c")
+        path = os.path.join(cache.workspace, f"attempt_{rung}.gif")
+        outcome = encode_gif(cache.input_args(settings.width), preset, path, duration, cache.workspace,
+                             settings, chunks, palettes)
+        frames = finalize_gif(path, duration, settings.fps)
+        attempts[rung] = (path, os.path.getsize(path), frames, outcome)
+        return attempts[rung][1]
+    
+    chosen = 0
+    if attempt(0) > max_bytes:
+        # Sizes shrink along the ladder, so binary-search the first rung that fits
+        low, high = 1, len(ladder) - 1
+        chosen = high
+        while low <= high:
+            middle = (low + high) // 2
+            if attempt(middle) <= max_bytes:
+                chosen, high = middle, middle - 1
+            else:
+                low = middle + 1
+        if chosen not in attempts:
+            attempt(chosen)
+    
+    path, size, frames, _ = attempts[chosen]
+    shutil.move(path, output_path)
+    return {
+        "max_bytes": max_bytes,
+        "fits": size <= max_bytes,
+        "bytes": size,
+        "settings": asdict(ladder[chosen]),
+        "frames": frames,
+        "attempts": [dict(asdict(ladder[rung]), bytes=attempts[rung][1], palette=attempts[rung][3])
+                     for rung in sorted(attempts)],
+    }
+
+
+def capture_command(input_args: List[str], preset: Preset, output_path: str,
+                    trim_end: Optional[float] = None, palette_mode: str = PALETTE_GLOBAL,
+                    cache: Optional[ScaledFrameCache] = None,
+                    formats: Optional[List[str]] = None,
+                    widths: Optional[List[int]] = None) -> List[str]:
+    """The ffmpeg command fed by the capture: the outputs themselves, or the decoded frame cache."""
+    if cache is not None:
+        return cache.fill_command(input_args, trim_end)
+    outputs = format_outputs(output_path, formats or [])
+    rungs = ladder_outputs(output_path, widths or [])
+    if outputs or rungs:
+        return build_output_command(input_args, preset, output_path, outputs, trim_end, palette_mode, rungs)
+    return build_gif_command(input_args, preset, output_path, trim_end, palette_mode)
+
+
+# ============================================================
+# PRESET VARIANTS (CAPTURE ONCE, ENCODE MANY)
+# ============================================================
+# Presets mix capture knobs (scroll_step, scroll_delay, preloader_wait) with
+# encode knobs (fps, colors). Variants reuse one capture - taken with the
+# primary preset's capture knobs - and only apply their own encode knobs.
+
+VARIANT_WORKERS = os.cpu_count() or 1  # Upper bound on parallel variant encodes
+
+
+def preset_variants(output_path: str, exclude: Optional[str] = None) -> List[Tuple[Preset, str]]:
+    """(preset, output_path) for every preset but exclude, named <stem>_<preset key><ext>."""
+    stem, ext = os.path.splitext(output_path)
+    return [(preset, f"{stem}_{key}{ext or '.gif'}") for key, preset in PRESETS.items() if key != exclude]
+
+
+def encode_variant(input_args: List[str], preset: Preset, output_path: str, duration: float,
+                   workspace: str, chunks: int = 1,
+                   palettes: Optional["PaletteCache"] = None) -> dict:
+    """Encode one preset from the decoded frame cache (runs in a worker process)."""
+    start = time.monotonic()
+    outcome = encode_gif(input_args, preset, output_path, duration, workspace, chunks=chunks, palettes=palettes)
+    return {
+        "preset": preset.name,
+        "output": output_path,
+        "fps": preset.fps,
+        "colors": preset.colors,
+        "bytes": os.path.getsize(output_path),
+        "frames": finalize_gif(output_path, duration, preset.fps),
+        "palette": outcome,
+        "seconds": round(time.monotonic() - start, 2),
+    }
 
-def normalize_url(url: str) -> str:
-    """
-    Normalize URL by adding https:// if missing.
-    e.g., "lobjetnorman.hu" -> "https://lobjetnorman.hu"
-         "www.example.com" -> "https://www.example.com"
-         "http://site.com" -> "http://site.com" (keeps http if specified)
+
+def finish_gif(output_path: str, preset: Preset, duration: float, report: dict,
+               max_bytes: Optional[int] = None, cache: Optional[ScaledFrameCache] = None,
+               status_callback: Optional[Callable] = None,
+               variants: Optional[List[Tuple[Preset, str]]] = None,
+               formats: Optional[List[str]] = None,
+               widths: Optional[List[int]] = None,
+               palettes: Optional["PaletteCache"] = None, chunks: int = GIF_ENCODE_CHUNKS):
     """
-    url = url.strip()
-    if not url:
-        return url
+    Produce the outputs once the capture has been encoded or cached.
     
-    # If no protocol specified, add https://
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
+    Without a cache the capture command already wrote the GIF (and any
+    extra formats and ladder rungs); it only needs finalize_gif. With one, the primary GIF
+    goes through the target-size search (max_bytes) or a plain encode -
+    split into up to `chunks` parallel chunks when there are no
+    variants - every variant is encoded from the same cached frames on a
+    process pool (sizes collected in report["variants"]), and the extra
+    formats and ladder rungs come from one more multi-output pass over the
+    cache. Rung sizes are collected in report["ladder"].
     
-    return url
+    GIFs encoded from the cache take their palette from palettes (a
+    PaletteCache bound to the site) when given; the primary GIF's outcome
+    is recorded in report["palette_cache"].
+    
+    A cache whose base file comes from the CaptureCache can be used here
+    directly: nothing in the outputs depends on the browser.
+    """
+    if cache is None:
+        report["frames"] = finalize_gif(output_path, duration, preset.fps)
+    elif not variants and not max_bytes:
+        result = encode_variant(cache.input_args(GIF_WIDTH), preset, output_path, duration,
+                                cache.workspace, chunks, palettes)
+        report["frames"] = result["frames"]
+        report["palette_cache"] = result["palette"]
+    elif not variants:
+        report["target"] = encode_to_target(cache, preset, output_path, max_bytes, duration, status_callback,
+                                            chunks, palettes)
+        report["frames"] = report["target"]["frames"]
+    else:
+        jobs = variants if max_bytes else [(preset, output_path)] + variants
+        input_args = cache.input_args(GIF_WIDTH)
+        if status_callback:
+            status_callback(f"🔧 Encoding {len(jobs) + bool(max_bytes)} variants...")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(len(jobs), VARIANT_WORKERS)) as executor:
+            futures = [executor.submit(encode_variant, input_args, p, path, duration, cache.workspace, 1, palettes)
+                       for p, path in jobs]
+            results = []
+            if max_bytes:
+                # The target search runs here while the pool encodes the variants
+                target = encode_to_target(cache, preset, output_path, max_bytes, duration, status_callback,
+                                          palettes=palettes)
+                report["target"] = target
+                results.append({
+                    "preset": preset.name, "output": output_path,
+                    "fps": target["settings"]["fps"], "colors": target["settings"]["colors"],
+                    "bytes": target["bytes"], "frames": target["frames"],
+                })
+            results += [future.result() for future in futures]
+        report["variants"] = results
+        report["frames"] = results[0]["frames"]
+        if not max_bytes:
+            report["palette_cache"] = results[0]["palette"]
+    
+    outputs = format_outputs(output_path, formats or [])
+    rungs = ladder_outputs(output_path, widths or [])
+    if cache is not None and (outputs or rungs):
+        if status_callback:
+            status_callback(f"🔧 Encoding {', '.join(list(outputs) + [f'{w}px' for w in rungs])}...")
+        run_ffmpeg(build_output_command(cache.input_args(GIF_WIDTH), preset, None, outputs, rungs=rungs))
+    if rungs:
+        # Target-size mode may have narrowed the primary GIF
+        width = report["target"]["settings"]["width"] if "target" in report else GIF_WIDTH
+        report["ladder"] = [{"width": width, "output": output_path, "bytes": os.path.getsize(output_path),
+                             "frames": report["frames"]}]
+        report["ladder"] += [
+            {"width": width, "output": path, "bytes": os.path.getsize(path),
+             "frames": finalize_gif(path, duration, preset.fps)}
+            for width, path in rungs.items()
+        ]
 
 
-def extract_domain_name(url: str) -> str:
+# ============================================================
+# CAPTURE CACHE
+# ============================================================
+# Decoded captures kept across runs, keyed by everything that shapes the
+# frames (URL, viewport, scroll plan, capture mode) but not by encode knobs,
+# so changing fps/colors/size budget re-encodes without opening a browser.
+
+CAPTURE_CACHE_DIR = os.environ.get("SITEGIFFER_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "sitegiffer", "captures")
+CAPTURE_CACHE_MAX_MB = 4096   # LRU eviction keeps the cache under this size
+CAPTURE_CACHE_MAX_AGE_H = float(os.environ.get("SITEGIFFER_CACHE_MAX_AGE_H") or 24)  # Sites change; re-record after this
+CAPTURE_CACHE_FPS = max(p.fps for p in PRESETS.values())  # Cached captures serve every preset
+CAPTURE_CACHE_VERSION = 2     # Bump when the stored frames change (2: content-trimmed)
+
+# Capture details copied into the job report on a cache hit
+CAPTURE_REPORT_KEYS = ("capture_mode", "network", "page_ready", "preloader_wait", "ready_reason",
+                       "static_unsafe_reasons")
+
+
+def cacheable_capture(report: dict) -> bool:
+    """Whether a capture is worth replaying: the network settled and the preloader finished."""
+    return report.get("network") == "settled" and report.get("page_ready") is True
+
+
+class CaptureCache:
     """
-    Extract clean domain name from URL for filename.
-    e.g., "https://lobjetnorman.hu/page" -> "lobjetnorman"
+    Content-addressed, size-bounded LRU store of captures on disk.
+    
+    Each entry is a directory holding the deduplicated full-width frames
+    (FFV1 in NUT - lossless, variable frame timing) and a meta.json with
+    fps, duration and the capture part of the job report. The meta file's
+    mtime is the entry's last use, the frame file's its capture time.
+    Entries older than max_age_h are not served; with refresh nothing is
+    served, so every capture is recorded again and replaces its entry.
     """
-    try:
-        # Normalize URL first
-        url = normalize_url(url)
-        parsed = urlparse(url)
-        domain = parsed.netloc or parsed.path
-        # Remove www. prefix
-        domain = re.sub(r'^www\.', '', domain)
-        # Get only the domain name (without TLD)
-        domain_parts = domain.split('.')
-        if len(domain_parts) >= 2:
-            # Return main domain name (e.g., "lobjetnorman" from "lobjetnorman.hu")
-            return domain_parts[0]
-        return domain
-    except:
-        return "portfolio"
 
+    def __init__(self, root: str = CAPTURE_CACHE_DIR, max_mb: float = CAPTURE_CACHE_MAX_MB,
+                 max_age_h: float = CAPTURE_CACHE_MAX_AGE_H, refresh: bool = False):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age = max_age_h * 3600
+        self.refresh = refresh
 
-def get_dynamic_filename(url: str) -> str:
-    """Generate dynamic filename based on URL domain."""
-    domain = extract_domain_name(url)
-    # Sanitize for filename
-    safe_name = re.sub(r'[^a-zA-Z0-9_-]', '', domain)
-    return f"{safe_name}.gif" if safe_name else "portfolio.gif"
+    @staticmethod
+    def key(url: str, preset: Preset, capture_mode: str) -> str:
+        """Cache key of a capture (encode settings deliberately left out)."""
+        plan = {
+            "version": CAPTURE_CACHE_VERSION,
+            "url": url,
+            "viewport": VIEWPORT,
+            "scroll_step": preset.scroll_step,
+            "scroll_delay": preset.scroll_delay,
+            "preloader_wait": preset.preloader_wait,
+            "capture_mode": capture_mode,
+        }
+        return hashlib.sha256(json.dumps(plan, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def lookup(self, key: str, fps: int) -> Optional[dict]:
+        """
+        Cached capture for key, if there is a fresh one with at least fps frames/s.
+        
+        Returns:
+            Its meta dict, with "frames" set to the frame file path
+        """
+        if self.refresh:
+            return None
+        meta_path = os.path.join(self._entry(key), "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta["frames"] = os.path.join(self._entry(key), "frames.nut")
+        try:
+            age = time.time() - os.path.getmtime(meta["frames"])
+        except OSError:
+            return None
+        if meta.get("fps", 0) < fps or age > self.max_age:
+            return None
+        os.utime(meta_path)  # Mark as recently used
+        return meta
+
+    def store(self, key: str, frames_path: str, fps: int, duration: float, report: dict):
+        """Copy a filled ScaledFrameCache base file (already FFV1) into the cache, then evict."""
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.root)
+        try:
+            shutil.copyfile(frames_path, os.path.join(staging, "frames.nut"))
+            meta = {
+                "fps": fps,
+                "duration": duration,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "report": {k: report[k] for k in CAPTURE_REPORT_KEYS if k in report},
+            }
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            # Another job may have stored the same capture meanwhile; last one wins
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            os.rename(staging, self._entry(key))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._evict(keep=key)
+
+    def _evict(self, keep: str):
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                last_used = os.path.getmtime(os.path.join(path, "meta.json"))
+            except OSError:
+                continue
+            entries.append((last_used, size, name))
+            total += size
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name != keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                total -= size
+
+
+def replay_capture(entry: dict, preset: Preset, output_path: str, report: dict, workspace: str,
+                   max_bytes: Optional[int] = None, variants: Optional[List[Tuple[Preset, str]]] = None,
+                   status_callback: Optional[Callable] = None, formats: Optional[List[str]] = None,
+                   widths: Optional[List[int]] = None, palettes: Optional["PaletteCache"] = None,
+                   chunks: int = GIF_ENCODE_CHUNKS):
+    """Produce every output from a cached capture (no browser involved)."""
+    cache = ScaledFrameCache(workspace, entry["fps"])
+    cache.paths[GIF_WIDTH] = entry["frames"]
+    report.update(entry["report"])
+    finish_gif(output_path, preset, entry["duration"], report, max_bytes, cache, status_callback,
+               variants, formats, widths, palettes, chunks)
 
 
 # ============================================================
-# GIF GENERATION FUNCTIONS
+# PALETTE CACHE
 # ============================================================
+# Palettes kept across runs per site, preset and color count. A site that
+# is re-rendered with the same brand colors reuses its palette instead of
+# running palettegen over every frame again, as long as a few sampled
+# frames still quantize about as well as when the palette was built.
 
-def smooth_scroll_down(page, scroll_step=80, delay=0.04):
-    """Scroll smoothly to the bottom of the page."""
-    scroll_height = page.evaluate("document.body.scrollHeight")
-    viewport_height = page.evaluate("window.innerHeight")
-    total_scroll_distance = scroll_height - viewport_height
-    total_scrolls = int(total_scroll_distance / scroll_step) + 1
+PALETTE_CACHE_DIR = os.environ.get("SITEGIFFER_PALETTE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "sitegiffer", "palettes")
+PALETTE_DRIFT_TOLERANCE = 0.10  # Reuse while sampled RMS error is at most this much worse
+
+
+class PaletteCache:
+    """
+    Per-site palette store on disk.
     
-    for i in range(total_scrolls):
-        page.mouse.wheel(0, scroll_step)
-        time.sleep(delay)
+    Each entry is the palettegen image plus a JSON file with the RMS error
+    the palette had on the frames it was built from. On reuse the same
+    error is measured on frames sampled from the new capture; if it has
+    grown by more than PALETTE_DRIFT_TOLERANCE the site has drifted, and
+    the palette is generated and stored again.
+    """
+
+    def __init__(self, root: str = PALETTE_CACHE_DIR, site: Optional[str] = None):
+        self.root = root
+        self.site = site
+
+    def for_site(self, url: str) -> "PaletteCache":
+        """This cache, keyed to url's domain."""
+        domain = re.sub(r"^www\.", "", urlparse(normalize_url(url)).netloc.lower())
+        return PaletteCache(self.root, domain or "portfolio")
+
+    def _path(self, preset: Preset, settings: EncodeSettings) -> str:
+        preset_name = re.sub(r"^\[\d+\]\s*", "", preset.name).lower()  # "[3] Balanced" -> "balanced"
+        name = f"{self.site}_{preset_name}_{settings.colors}c"
+        return os.path.join(self.root, re.sub(r"[^a-zA-Z0-9_.-]+", "_", name))
+
+    def has_entry(self, preset: Preset) -> bool:
+        """Whether a palette is stored for preset's own encode settings."""
+        return os.path.exists(self._path(preset, EncodeSettings.from_preset(preset)) + ".json")
+
+    def palette(self, preset: Preset, settings: EncodeSettings, input_args: List[str],
+                workspace: str, duration: float) -> Tuple[str, str]:
+        """
+        Palette for encoding input_args (a ScaledFrameCache input, duration
+        seconds long) with settings.
         
-        current_position = page.evaluate("window.scrollY")
-        if current_position >= total_scroll_distance - 10:
-            break
-    
-    time.sleep(0.3)
+        Returns:
+            (palette image in the workspace, "hit" / "miss" / "drift")
+        """
+        entry = self._path(preset, settings)
+        palette_path = os.path.join(workspace, os.path.basename(entry) + ".png")
+        frames = sample_video_frames(input_args[-1], settings.width, gif_height(settings.width), duration,
+                                     2 * PALETTE_KEYFRAMES)
+        outcome = "miss"
+        try:
+            with open(entry + ".json", encoding="utf-8") as f:
+                baseline = json.load(f)["error"]
+            shutil.copyfile(entry + ".png", palette_path)
+            if palette_error(frames, load_palette(palette_path)) <= baseline * (1 + PALETTE_DRIFT_TOLERANCE):
+                return palette_path, "hit"
+            outcome = "drift"
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        build_palette(input_args, settings, palette_path, duration, frames)
+        meta = {
+            "site": self.site,
+            "preset": preset.name,
+            "colors": settings.colors,
+            "error": palette_error(frames, load_palette(palette_path)),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            # Image first, then the meta file that makes the entry valid
+            with open(palette_path, "rb") as f:
+                self._replace(entry + ".png", f.read())
+            self._replace(entry + ".json", json.dumps(meta).encode("utf-8"))
+        except OSError:
+            pass  # A read-only cache only costs the reuse
+        return palette_path, outcome
 
+    def _replace(self, path: str, data: bytes):
+        # A private temp name per writer, so concurrent batch workers never share one
+        fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
 
-def smooth_scroll_up(page, scroll_step=80, delay=0.04):
-    """Scroll smoothly back to the top of the page for seamless loop."""
-    current_position = page.evaluate("window.scrollY")
-    total_scrolls = int(current_position / scroll_step) + 1
-    
-    for i in range(total_scrolls):
-        page.mouse.wheel(0, -scroll_step)  # Negative for scrolling up
-        time.sleep(delay)
+
+# ============================================================
+# ASYNC CAPTURE ENGINE
+# ============================================================
+# Same capture modes and Preset semantics as generate_gif, built on
+# playwright.async_api so one event loop can run many captures against a
+# shared browser. The in-page JS (readiness, settle, scroll driver) is
+# shared with the sync path; only the Playwright calls differ.
+
+ASYNC_CONCURRENCY = 4  # Default concurrent captures per shared browser
+
+
+async def goto_and_settle_async(page, url: str) -> str:
+    """goto_and_settle() for playwright.async_api pages."""
+    tracker = NetworkSettleTracker(page)
+    try:
+        await page.goto(url, wait_until="domcontentloaded", timeout=NAVIGATION_TIMEOUT_MS)
         
-        new_position = page.evaluate("window.scrollY")
-        if new_position <= 10:
-            break
+        start = time.monotonic()
+        try:
+            await page.wait_for_load_state("load", timeout=NETWORK_SETTLE_TIMEOUT * 1000)
+        except AsyncPlaywrightTimeoutError:
+            pass
+        
+        remaining = NETWORK_SETTLE_TIMEOUT - (time.monotonic() - start)
+        if await tracker.wait_quiet_async(max(0.0, remaining)):
+            return "settled"
+        
+        await asyncio.sleep(FALLBACK_QUIET_S)
+        return "load+quiet"
+    finally:
+        tracker.detach()
+
+
+async def wait_for_page_ready_async(page, max_wait: float) -> Tuple[bool, float, str]:
+    """wait_for_page_ready() for playwright.async_api pages."""
+    start = time.time()
+    try:
+        result = await page.evaluate(READINESS_JS, readiness_options(max_wait))
+        return result["ready"], result["waited_ms"] / 1000, result["reason"]
+    except Exception:
+        remaining = max_wait - (time.time() - start)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        return False, time.time() - start, "fallback"
+
+
+async def static_capture_safe_async(page) -> Tuple[bool, List[str]]:
+    """static_capture_safe() for playwright.async_api pages."""
+    try:
+        reasons = await page.evaluate(STATIC_SAFETY_JS, STATIC_MAX_PAGE_HEIGHT)
+    except Exception as e:
+        reasons = [f"check-failed:{type(e).__name__}"]
+    return not reasons, reasons
+
+
+class AsyncScreencastRecorder(ScreencastRecorder):
+    """
+    ScreencastRecorder for playwright.async_api pages.
     
-    # Ensure we're exactly at top (no flash)
-    page.evaluate("window.scrollTo({top: 0, behavior: 'instant'})")
-    time.sleep(0.2)
+    Frames are stored on one feeder thread, so a full encoder queue never
+    blocks the event loop (and every other capture on it). Each frame is
+    acked once it has been handed over, which throttles the screencast
+    instead.
+    """
+
+    async def start(self):
+        self._feeder = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-feed")
+        self._cdp = await self.page.context.new_cdp_session(self.page)
+        self._cdp.on("Page.screencastFrame", self._on_frame)
+        await self._cdp.send("Page.startScreencast", {
+            "format": "jpeg",
+            "quality": self.quality,
+            "maxWidth": VIEWPORT["width"],
+            "maxHeight": VIEWPORT["height"],
+            "everyNthFrame": 1,
+        })
+
+    def _on_frame(self, params):
+        # Submitted in arrival order; the single feeder thread keeps it
+        stored = asyncio.get_running_loop().run_in_executor(self._feeder, self._store_frame, params)
+        asyncio.ensure_future(self._ack(params["sessionId"], stored))
+
+    async def _ack(self, session_id, stored):
+        try:
+            await stored
+            await self._cdp.send("Page.screencastFrameAck", {"sessionId": session_id})
+        except Exception:
+            pass
+
+    async def stop(self) -> Optional[str]:
+        self.end_time = time.time()
+        try:
+            await self._cdp.send("Page.stopScreencast")
+            await self._cdp.detach()
+        except Exception:
+            pass
+        try:
+            # Queued behind every frame still being handed over
+            return await asyncio.get_running_loop().run_in_executor(self._feeder, self._finish)
+        finally:
+            self._feeder.shutdown(wait=False)
+
+
+class AsyncVirtualTimeRecorder(VirtualTimeRecorder):
+    """VirtualTimeRecorder for playwright.async_api pages."""
+
+    async def _capture_frame(self):
+        data = await self.page.screenshot(type="jpeg", quality=self.quality)
+        # The sink blocks while the encoder pushes back - not on the event loop
+        await asyncio.to_thread(self._store_frame, data)
+
+    async def record_scroll(self, scroll_step: int, delay: float, hold: float = 0.3) -> Optional[str]:
+        frame_ms = 1000.0 / self.fps
+        
+        await self.page.clock.install()
+        await self.page.clock.pause_at(int(time.time() * 1000 + frame_ms))
+        await self.page.evaluate(f"(opts) => {{ ({SCROLL_DRIVER_JS})(opts); }}",
+                                 scroll_driver_options(1, scroll_step, delay, hold))
+        
+        await self._capture_frame()
+        max_frames = int(MAX_VIRTUAL_DURATION * self.fps)
+        while self.frame_count < max_frames:
+            await self.page.clock.run_for(frame_ms)
+            if await self.page.evaluate("window.__siteGifferScroll.done"):
+                break
+            await self._capture_frame()
+        
+        return self._finish()
 
 
-def generate_gif(url: str, preset: Preset, output_path: str, status_callback: Optional[Callable] = None) -> bool:
+class AsyncStaticScrollRenderer(StaticScrollRenderer):
+    """StaticScrollRenderer for playwright.async_api pages (frames() is shared)."""
+
+    async def capture(self):
+        await self.page.evaluate(EAGER_IMAGES_JS, STATIC_IMAGE_TIMEOUT_MS)
+        layout = await self.page.evaluate(PINNED_LAYOUT_JS)
+        
+        self.background = decode_image(await self._screenshot(HIDE_PINNED_CSS, full_page=True))
+        
+        fixed = self._fixed_selector(layout)
+        if fixed:
+            self._set_fixed_layer(decode_image(
+                await self._screenshot(self._show_only_css(fixed), omit_background=True), "RGBA"))
+        
+        for selector, pin in self._sticky_pins(layout):
+            pixels = decode_image(
+                await self._screenshot(self._show_only_css(selector), selector, omit_background=True), "RGBA")
+            self.sticky_layers.append((pin, pixels))
+        
+        await self.page.evaluate("window.scrollTo({top: 0, behavior: 'instant'})")
+
+    async def _screenshot(self, css: str, selector: Optional[str] = None, **options) -> bytes:
+        style = await self.page.add_style_tag(content=css)
+        try:
+            target = self.page.locator(selector) if selector else self.page
+            return await target.screenshot(type="png", **options)
+        finally:
+            await style.evaluate("el => el.remove()")
+
+
+async def run_ffmpeg_async(cmd: List[str], frames=None) -> int:
     """
-    Generate a seamless looping GIF from a website URL.
+    run_ffmpeg() in a worker thread.
     
-    The GIF scrolls down and then back up smoothly for perfect looping.
-    Recording starts AFTER preloader finishes.
+    Static captures synthesize (and trim) their frames while they are piped,
+    which is CPU-bound NumPy work - iterating them on the event loop would
+    stall every other capture sharing it.
+    """
+    return await asyncio.to_thread(run_ffmpeg, cmd, frames)
+
+
+async def generate_gif_async(url: str, preset: Preset, output_path: str,
+                             status_callback: Optional[Callable] = None, browser=None,
+                             capture_mode: str = CAPTURE_SCREENCAST,
+                             report: Optional[dict] = None, palette_mode: str = PALETTE_GLOBAL,
+                             max_bytes: Optional[int] = None,
+                             variants: Optional[List[Tuple[Preset, str]]] = None,
+                             capture_cache: Optional[CaptureCache] = None,
+                             formats: Optional[List[str]] = None,
+                             widths: Optional[List[int]] = None,
+                             palette_cache: Optional[PaletteCache] = None,
+                             encode_chunks: Optional[int] = None) -> bool:
+    """
+    Asyncio version of generate_gif.
     
     Args:
         url: Target website URL
         preset: Configuration preset
         output_path: Output GIF file path
         status_callback: Optional callback function for status updates
+        browser: Optional shared async Browser; each capture gets its own
+                 context on it. When omitted a private browser is launched.
+        capture_mode: Any single-navigation mode (CAPTURE_SCREENCAST,
+                      CAPTURE_VIRTUAL, CAPTURE_STATIC, CAPTURE_AUTO)
+        report: Optional dict filled with per-phase timings and capture details
+        palette_mode: PALETTE_GLOBAL or PALETTE_PER_FRAME (see generate_gif)
+        max_bytes: Optional size budget (see generate_gif)
+        variants: Optional extra (preset, output_path) GIFs (see generate_gif)
+        capture_cache: Optional CaptureCache (see generate_gif)
+        formats: Optional extra output formats (see generate_gif)
+        widths: Optional resolution ladder (see generate_gif)
+        palette_cache: Optional PaletteCache (see generate_gif)
+        encode_chunks: Parallel chunk encodes per GIF (see generate_gif)
     
     Returns:
         True if successful, False otherwise
     """
+    if capture_mode == CAPTURE_VIDEO:
+        raise ValueError("generate_gif_async does not support CAPTURE_VIDEO")
+    
     def update_status(msg):
         if status_callback:
             status_callback(msg)
     
+    report = report if report is not None else {}
+    playwright = None
+    job = None
+    recorder = None
+    renderer = None
+    concat_path = None
+    
     try:
-        update_status("🚀 Initializing browser...")
+        # Setup, encoding and caching are the blocking GifJob steps shared
+        # with generate_gif; only the browser is driven on the event loop
+        job = await asyncio.to_thread(GifJob, url, preset, output_path, report, status_callback, palette_mode,
+                                      max_bytes, variants, capture_cache, formats, widths, palette_cache,
+                                      encode_chunks)
+        if await asyncio.to_thread(job.replay_cached, capture_mode):
+            return True
+        capture_preset = job.capture_preset
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            
-            # ============================================================
-            # PHASE 1: Load page and wait for preloader (NO recording)
-            # ============================================================
-            update_status("🌐 Loading page (preloader phase)...")
-            
-            context_preload = browser.new_context(
-                viewport={"width": 1260, "height": 720}
-            )
-            page_preload = context_preload.new_page()
-            page_preload.goto(url, wait_until="networkidle", timeout=60000)
+        if browser is None:
+            update_status("🚀 Initializing browser...")
+            playwright = await async_playwright().start()
+            browser = await playwright.chromium.launch(headless=True)
+        job.timer.mark("browser")
+        
+        update_status("🌐 Loading page...")
+        context = await browser.new_context(viewport=VIEWPORT)
+        try:
+            page = await context.new_page()
+            report["network"] = await goto_and_settle_async(page, url)
+            job.timer.mark("load")
             
-            update_status(f"⏳ Waiting for preloader ({preset.preloader_wait}s)...")
-            time.sleep(preset.preloader_wait)
+            update_status(f"⏳ Waiting for preloader (max {preset.preloader_wait}s)...")
+            job.page_ready(*await wait_for_page_ready_async(page, preset.preloader_wait))
             
-            # Close preload context completely
-            page_preload.close()
-            context_preload.close()
+            if capture_mode == CAPTURE_AUTO:
+                capture_mode = job.auto_capture_mode(*await static_capture_safe_async(page))
+            report["capture_mode"] = capture_mode
             
-            # ============================================================
-            # PHASE 2: Fresh recording session (AFTER preloader)
-            # ============================================================
             update_status("🎥 Starting recording...")
+            encoder = job.start_encoder(capture_mode)
             
-            os.makedirs("./recordings", exist_ok=True)
-            
-            # New context with video recording
-            context_record = browser.new_context(
-                viewport={"width": 1260, "height": 720},
-                record_video_dir="./recordings",
-                record_video_size={"width": 1260, "height": 720}
-            )
-            
-            page = context_record.new_page()
-            
-            # Navigate fresh - page should load faster (cached)
-            page.goto(url, wait_until="networkidle", timeout=60000)
-            
-            # Small wait for any animations to settle (but NO long preloader)
-            time.sleep(0.5)
-            
-            # ============================================================
-            # SCROLL: Down and then Up for seamless loop
-            # ============================================================
-            update_status("📜 Scrolling down...")
-            smooth_scroll_down(page, preset.scroll_step, preset.scroll_delay)
-            
-            # Pause at bottom before ending
-            time.sleep(0.3)
-            
-            # Close to save video - do this cleanly to avoid flash
-            page.close()
-            context_record.close()
-            browser.close()
-        
-        # ============================================================
-        # PHASE 3: Convert video to optimized GIF
-        # ============================================================
-        update_status("🎨 Converting to GIF...")
-        
-        video_files = [f for f in os.listdir("./recordings") if f.endswith('.webm')]
-        if not video_files:
-            return False
+            if capture_mode == CAPTURE_STATIC:
+                update_status("📜 Capturing full page...")
+                renderer = AsyncStaticScrollRenderer(page)
+                await renderer.capture()
+            elif capture_mode == CAPTURE_VIRTUAL:
+                recorder = AsyncVirtualTimeRecorder(page, job.workspace, capture_preset.fps,
+                                                    sink=encoder and encoder.write)
+                update_status("📜 Scrolling down (virtual time)...")
+                concat_path = await recorder.record_scroll(preset.scroll_step, preset.scroll_delay)
+            else:
+                recorder = AsyncScreencastRecorder(page, job.workspace,
+                                                   sink=encoder and FrameResampler(capture_preset.fps, encoder.write))
+                await recorder.start()
+                update_status("📜 Scrolling down...")
+                await page.evaluate(SCROLL_DRIVER_JS, scroll_driver_options(
+                    1, preset.scroll_step, preset.scroll_delay, 0.3))
+                concat_path = await recorder.stop()
+        finally:
+            await context.close()
+        job.timer.mark("capture")
         
-        video_path = max(
-            [os.path.join("./recordings", f) for f in video_files],
-            key=os.path.getctime
-        )
+        return await asyncio.to_thread(job.finish, capture_mode, recorder, renderer, concat_path)
+    
+    except Exception as e:
+        update_status(f"❌ Error: {str(e)[:50]}")
+        return False
+    
+    finally:
+        if job is not None:
+            await asyncio.to_thread(job.close)
+        if playwright is not None:
+            if browser is not None:
+                await browser.close()
+            await playwright.stop()
+
+
+async def generate_many_async(jobs: List[Tuple[str, Preset, str]], concurrency: int = ASYNC_CONCURRENCY,
+                              capture_mode: str = CAPTURE_SCREENCAST,
+                              status_callback: Optional[Callable] = None) -> List[bool]:
+    """
+    Run several (url, preset, output_path) captures concurrently on one browser.
+    
+    status_callback, if given, is called as status_callback(job_index, msg).
+    
+    Returns:
+        One success flag per job, in job order
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
         
-        # Trim the last few frames to avoid flash (cut last 0.2 seconds)
-        trimmed_video = "./recordings/trimmed.webm"
+        async def run(index, url, preset, output_path):
+            callback = (lambda msg: status_callback(index, msg)) if status_callback else None
+            async with semaphore:
+                return await generate_gif_async(url, preset, output_path, callback,
+                                                browser=browser, capture_mode=capture_mode)
         
         try:
-            # Get video duration
-            probe_cmd = [
-                "ffprobe", "-v", "error", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", video_path
-            ]
-            result = subprocess.run(probe_cmd, capture_output=True, text=True)
-            duration = float(result.stdout.strip()) - 0.3  # Trim last 0.3s
-            
-            # Trim video
-            trim_cmd = [
-                "ffmpeg", "-y", "-i", video_path,
-                "-t", str(duration),
-                "-c", "copy", trimmed_video
-            ]
-            subprocess.run(trim_cmd, capture_output=True, check=True)
-            
-            # Use trimmed video for GIF
-            source_video = trimmed_video
-            
-        except:
-            # If trimming fails, use original
-            source_video = video_path
-        
-        # Convert using ffmpeg for best quality/size ratio
+            return await asyncio.gather(*(
+                run(i, url, preset, output_path) for i, (url, preset, output_path) in enumerate(jobs)
+            ))
+        finally:
+            await browser.close()
+
+
+# ============================================================
+# BATCH MODE
+# ============================================================
+
+BATCH_DEFAULT_PRESET = "balanced"
+BATCH_WORKER_RAM_MB = 1200   # Chromium + ffmpeg headroom per worker process
+BATCH_WORKSPACE_MB = 256     # FFV1 frame caches per worker, in RAM when the workspace is on tmpfs
+
+_batch_pool: Optional[BrowserPool] = None  # One warm pool per worker process
+
+
+def load_manifest(path: str) -> List[dict]:
+    """
+    Read a batch manifest (CSV, JSON or YAML) of url/preset/output rows.
+    
+    Missing presets default to BATCH_DEFAULT_PRESET and missing outputs to
+    the domain-based filename. An optional max_size column ("8MB") turns on
+    target-size mode for that row, an optional formats column ("webp,mp4")
+    adds outputs next to the GIF, an optional widths column
+    ("1260,840,420") adds a resolution ladder, and an optional palette_mode
+    column ("global" or "frame") picks how palettes are built.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if ext == ".csv":
+            rows = list(csv.DictReader(f))
+        elif ext in (".yaml", ".yml"):
+            if yaml is None:
+                raise RuntimeError("YAML manifests need PyYAML (pip install pyyaml)")
+            rows = yaml.safe_load(f) or []
+        else:
+            rows = json.load(f)
+    
+    if isinstance(rows, dict):
+        rows = rows.get("jobs", [])
+    
+    jobs = []
+    for line, row in enumerate(rows, start=1):
+        url = normalize_url(str(row.get("url") or ""))
+        if not url:
+            raise ValueError(f"Manifest row {line}: missing url")
+        preset = str(row.get("preset") or BATCH_DEFAULT_PRESET).strip()
+        if preset not in PRESETS:
+            raise ValueError(f"Manifest row {line}: unknown preset '{preset}'")
+        output = str(row.get("output") or get_dynamic_filename(url)).strip()
+        palette_mode = str(row.get("palette_mode") or "").strip() or None
+        if palette_mode not in (None, PALETTE_GLOBAL, PALETTE_PER_FRAME):
+            raise ValueError(f"Manifest row {line}: unknown palette_mode '{palette_mode}'")
         try:
-            update_status("🔧 Optimizing GIF...")
-            
-            palette_cmd = [
-                "ffmpeg", "-y", "-i", source_video,
-                "-vf", f"fps={preset.fps},scale=1260:-1:flags=lanczos,palettegen=max_colors={preset.colors}:stats_mode=diff",
-                "palette.png"
-            ]
-            
-            gif_cmd = [
-                "ffmpeg", "-y", "-i", source_video, "-i", "palette.png",
-                "-lavfi", f"fps={preset.fps},scale=1260:-1:flags=lanczos[x];[x][1:v]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle",
-                output_path
-            ]
-            
-            subprocess.run(palette_cmd, capture_output=True, check=True)
-            subprocess.run(gif_cmd, capture_output=True, check=True)
-            
-            if os.path.exists("palette.png"):
-                os.remove("palette.png")
+            max_bytes = parse_size(row["max_size"]) if row.get("max_size") else None
+            formats = parse_formats(row["formats"]) if row.get("formats") else None
+            widths = parse_widths(row["widths"]) if row.get("widths") else None
+        except ValueError as e:
+            raise ValueError(f"Manifest row {line}: {e}")
+        jobs.append({"url": url, "preset": preset, "output": output, "max_bytes": max_bytes,
+                     "formats": formats, "widths": widths, "palette_mode": palette_mode})
+    return jobs
+
+
+def job_key(job: dict) -> str:
+    """Stable identity of a manifest row, used to resume batches."""
+    key = f"{job['url']}|{job['preset']}|{os.path.abspath(job['output'])}"
+    if job.get("max_bytes"):
+        key += f"|{job['max_bytes']}"
+    if job.get("formats"):
+        key += "|" + ",".join(job["formats"])
+    if job.get("widths"):
+        key += "|" + ",".join(map(str, job["widths"]))
+    if job.get("palette_mode") not in (None, PALETTE_GLOBAL):
+        key += f"|{job['palette_mode']}"
+    return key
+
+
+def available_memory_mb() -> Optional[float]:
+    """Currently available RAM in MB (None if it can't be determined)."""
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def default_worker_count() -> int:
+    """Worker processes that fit the available cores and RAM."""
+    workers = os.cpu_count() or 1
+    memory = available_memory_mb()
+    if memory is not None:
+        workers = min(workers, int(memory // (BATCH_WORKER_RAM_MB + BATCH_WORKSPACE_MB)))
+    return max(1, workers)
+
+
+def _batch_run_job(job: dict, capture_mode: str, use_capture_cache: bool = False,
+                   use_palette_cache: bool = True, refresh_captures: bool = False,
+                   encode_chunks: int = 1) -> dict:
+    """Run one manifest row inside a worker process."""
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = BrowserPool(size=1)
+        # Pool workers leave via os._exit, so atexit never runs; multiprocessing
+        # runs finalizers with an exitpriority on the way out
+        multiprocessing.util.Finalize(_batch_pool, _batch_pool.close, exitpriority=10)
+    
+    messages = []
+    report = {}
+    start = time.time()
+    ok = generate_gif(job["url"], PRESETS[job["preset"]], job["output"], messages.append,
+                      pool=_batch_pool, capture_mode=capture_mode, report=report,
+                      palette_mode=job.get("palette_mode") or PALETTE_GLOBAL, max_bytes=job.get("max_bytes"), formats=job.get("formats"), widths=job.get("widths"),
+                      capture_cache=CaptureCache(refresh=refresh_captures) if use_capture_cache else None,
+                      palette_cache=PaletteCache() if use_palette_cache else None,
+                      encode_chunks=encode_chunks)
+    
+    status = "ok" if ok else "failed"
+    if ok and not report.get("target", {}).get("fits", True):
+        status = "over_budget"  # Written with the smallest settings, still above max_size
+    
+    result = dict(job)
+    result.update({
+        "status": status,
+        "seconds": round(time.time() - start, 2),
+        "bytes": os.path.getsize(job["output"]) if ok and os.path.exists(job["output"]) else None,
+        "report": report,
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    if not ok and messages:
+        result["error"] = messages[-1]
+    return result
+
+
+def _save_results(path: str, results: dict):
+    # Write-then-rename so an interrupted batch never leaves a torn file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"jobs": results}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def run_batch(manifest_path: str, results_path: Optional[str] = None, workers: Optional[int] = None,
+              capture_mode: str = CAPTURE_SCREENCAST, max_bytes: Optional[int] = None,
+              use_capture_cache: bool = False, formats: Optional[List[str]] = None,
+              widths: Optional[List[int]] = None, use_palette_cache: bool = True,
+              refresh_captures: bool = False, palette_mode: str = PALETTE_GLOBAL) -> int:
+    """
+    Render every manifest row on a process pool and record per-job results.
+    
+    Rows that already succeeded in the results file (and whose output still
+    exists) are skipped, so rerunning an interrupted batch resumes it.
+    max_bytes is the size budget for rows without their own max_size, and
+    formats the extra outputs, widths the resolution ladder and
+    palette_mode the palette mode for rows without their own column.
+    With use_capture_cache (off by default: it routes every capture through
+    a decoded-frame file at CAPTURE_CACHE_FPS instead of the streaming GIF
+    encode), pages captured before with the same scroll plan are re-encoded
+    from the CaptureCache instead of being recorded again
+    (refresh_captures records them anyway and replaces the entries),
+    and with use_palette_cache each site's palette comes from the
+    PaletteCache while it still fits.
+    
+    Returns:
+        Number of failed jobs, counting GIFs that missed their max_bytes
+        ("over_budget": written at the smallest settings anyway)
+    """
+    jobs = load_manifest(manifest_path)
+    for job in jobs:
+        job["max_bytes"] = job["max_bytes"] or max_bytes
+        job["formats"] = job["formats"] or formats
+        job["widths"] = job["widths"] or widths
+        job["palette_mode"] = job["palette_mode"] or palette_mode
+    results_path = results_path or os.path.splitext(manifest_path)[0] + ".results.json"
+    
+    results = {}
+    if os.path.exists(results_path):
+        with open(results_path, encoding="utf-8") as f:
+            results = json.load(f).get("jobs", {})
+    
+    pending = [
+        job for job in jobs
+        if not (results.get(job_key(job), {}).get("status") == "ok" and os.path.exists(job["output"]))
+    ]
+    skipped = len(jobs) - len(pending)
+    workers = max(1, min(workers or default_worker_count(), len(pending) or 1))
+    # Split the cores between workers instead of letting each chunk a GIF over all of them
+    encode_chunks = max(1, (os.cpu_count() or 1) // workers)
+    
+    print(f"📋 {len(jobs)} jobs ({skipped} already done), {workers} worker(s)")
+    
+    failures = 0
+    done = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_batch_run_job, job, capture_mode, use_capture_cache, use_palette_cache,
+                                   refresh_captures, encode_chunks): job
+                   for job in pending}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = dict(job, status="failed", error=f"{type(e).__name__}: {e}")
+                results[job_key(job)] = result
+                _save_results(results_path, results)
                 
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            # Fallback to MoviePy
-            video = VideoFileClip(source_video)
-            video.write_gif(output_path, fps=preset.fps)
-            video.close()
-        
-        # Cleanup
-        if os.path.exists(video_path):
-            os.remove(video_path)
-        if os.path.exists(trimmed_video):
-            os.remove(trimmed_video)
-        
-        update_status("✅ Done!")
-        return True
-        
-    except Exception as e:
-        update_status(f"❌ Error: {str(e)[:50]}")
-        return False
+                done += 1
+                size = f"{result['bytes'] / 1000 ** 2:.2f} MB" if result.get("bytes") else "?"
+                if result["status"] == "ok":
+                    print(f"✅ [{done}/{len(pending)}] {job['output']} ({size}, {result['seconds']}s)")
+                elif result["status"] == "over_budget":
+                    failures += 1
+                    print(f"⚠️ [{done}/{len(pending)}] {job['output']} ({size}) is over "
+                          f"{job['max_bytes'] / 1000 ** 2:.2f} MB even at the smallest settings")
+                else:
+                    failures += 1
+                    print(f"❌ [{done}/{len(pending)}] {job['url']}: {result.get('error', 'failed')}")
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    print(f"📄 Results: {results_path}")
+    return failures
 
 
 # ============================================================
@@ -356,8 +3801,15 @@ def generate_gif(url: str, preset: Preset, output_path: str, status_callback: Op
 class InteractiveCLI:
     """Interactive CLI with curses-based UI"""
     
-    def __init__(self, stdscr):
+    def __init__(self, stdscr, pool: Optional[BrowserPool] = None,
+                 capture_cache: Optional[CaptureCache] = None,
+                 palette_cache: Optional[PaletteCache] = None,
+                 palette_mode: str = PALETTE_GLOBAL):
         self.stdscr = stdscr
+        self.pool = pool  # Warm browsers reused across generations
+        self.capture_cache = capture_cache  # Re-encode unchanged captures without a browser
+        self.palette_cache = palette_cache  # Reuse a site's palette while it still fits
+        self.palette_mode = palette_mode  # PALETTE_GLOBAL or PALETTE_PER_FRAME
         self.url = "https://example.com"
         self.selected_preset = "balanced"
         self.output_path = ""  # Will be set dynamically
@@ -428,6 +3880,7 @@ class InteractiveCLI:
                 ("[2] Select Preset", f"Current: {PRESETS[self.selected_preset].name}"),
                 ("[3] Output File", f"{filename_mode}: {current_filename}"),
                 ("[4] Generate GIF", "Start the recording process"),
+                ("[5] Compare Presets", "Capture once, encode every preset"),
                 ("[Q] Exit", "Close the application")
             ]
             
@@ -456,7 +3909,7 @@ class InteractiveCLI:
                 self.stdscr.attron(curses.color_pair(1))
                 self.stdscr.addstr(y, 2, "-" * min(50, width - 4))
                 self.stdscr.addstr(y + 1, 2, f"Preset: {preset.description}"[:width-4])
-                self.stdscr.addstr(y + 2, 2, f"FPS: {preset.fps} | Colors: {preset.colors} | Wait: {preset.preloader_wait}s"[:width-4])
+                self.stdscr.addstr(y + 2, 2, f"FPS: {preset.fps} | Colors: {preset.colors} | Max wait: {preset.preloader_wait}s"[:width-4])
                 self.stdscr.attroff(curses.color_pair(1))
         except curses.error:
             pass
@@ -528,8 +3981,13 @@ class InteractiveCLI:
         self.draw_status()
         self.stdscr.refresh()
         
-    def run_generation(self):
-        """Run the GIF generation process"""
+    def run_generation(self, compare: bool = False):
+        """
+        Run the GIF generation process.
+        
+        With compare=True the selected preset's capture is also encoded with
+        every other preset (<name>_<preset>.gif) and the sizes are listed.
+        """
         self.stdscr.clear()
         self.draw_header()
         
@@ -537,9 +3995,11 @@ class InteractiveCLI:
         
         # Get the actual output filename
         output_file = self.get_output_filename()
+        variants = preset_variants(output_file, exclude=self.selected_preset) if compare else None
+        report = {}
         
         self.stdscr.attron(curses.color_pair(3) | curses.A_BOLD)
-        self.stdscr.addstr(5, 2, "Generating GIF..."[:width-4])
+        self.stdscr.addstr(5, 2, ("Generating all presets..." if compare else "Generating GIF...")[:width-4])
         self.stdscr.attroff(curses.color_pair(3) | curses.A_BOLD)
         
         self.stdscr.addstr(7, 2, f"URL: {self.url[:min(45, width-8)]}")
@@ -553,6 +4013,7 @@ class InteractiveCLI:
             clean_msg = msg.replace("🚀", "[*]").replace("🌐", "[>]").replace("⏳", "[~]")
             clean_msg = clean_msg.replace("🎥", "[R]").replace("📜", "[S]").replace("🎨", "[C]")
             clean_msg = clean_msg.replace("🔧", "[O]").replace("✅", "[OK]").replace("❌", "[X]")
+            clean_msg = clean_msg.replace("♻️", "[=]").replace("💾", "[D]").replace("🎯", "[T]")
             self.stdscr.addstr(status_line, 2, " " * min(50, width-4))
             self.stdscr.attron(curses.color_pair(2))
             self.stdscr.addstr(status_line, 2, clean_msg[:min(48, width-4)])
@@ -564,10 +4025,29 @@ class InteractiveCLI:
         self.stdscr.refresh()
         
         preset = PRESETS[self.selected_preset]
-        success = generate_gif(self.url, preset, output_file, status_callback)
+        success = generate_gif(self.url, preset, output_file, status_callback, pool=self.pool,
+                               report=report, palette_mode=self.palette_mode, variants=variants,
+                               capture_cache=self.capture_cache, palette_cache=self.palette_cache)
         
         self.stdscr.nodelay(False)
         
+        if success and compare:
+            self.stdscr.attron(curses.color_pair(2) | curses.A_BOLD)
+            self.stdscr.addstr(15, 2, "[OK] Sizes from one capture:"[:width-4])
+            self.stdscr.attroff(curses.color_pair(2) | curses.A_BOLD)
+            y = 16
+            for variant in report.get("variants", []):
+                if y >= height - 3:
+                    break
+                line = (f"{variant['preset']:<18} {variant['fps']:>2} fps {variant['colors']:>3} colors "
+                        f"{variant['bytes'] / (1024 * 1024):>7.2f} MB  {os.path.basename(variant['output'])}")
+                self.safe_addstr(y, 4, line)
+                y += 1
+            self.safe_addstr(y + 1, 2, "Press any key to continue...")
+            self.stdscr.refresh()
+            self.stdscr.getch()
+            return
+        
         if success:
             # Get file size
             try:
@@ -592,7 +4072,7 @@ class InteractiveCLI:
         
     def handle_main_menu(self, key):
         """Handle main menu input"""
-        menu_len = 5
+        menu_len = 6
         
         if key == curses.KEY_UP:
             self.menu_index = (self.menu_index - 1) % menu_len
@@ -618,7 +4098,9 @@ class InteractiveCLI:
                     self.auto_filename = True
             elif self.menu_index == 3:  # Generate
                 self.run_generation()
-            elif self.menu_index == 4:  # Exit
+            elif self.menu_index == 4:  # Compare presets
+                self.run_generation(compare=True)
+            elif self.menu_index == 5:  # Exit
                 return False
         elif key in [ord('q'), ord('Q'), 27]:  # Q or Esc
             return False
@@ -680,20 +4162,71 @@ class InteractiveCLI:
                 pass
 
 
-def main(stdscr):
+def main(stdscr, args):
     """Main entry point for curses"""
-    cli = InteractiveCLI(stdscr)
-    cli.run()
+    use_capture_cache = args.capture_cache or args.refresh_captures
+    capture_cache = CaptureCache(refresh=args.refresh_captures) if use_capture_cache else None
+    # Browsers launch on the first generation and are then kept warm
+    with BrowserPool() as pool:
+        cli = InteractiveCLI(stdscr, pool=pool, capture_cache=capture_cache, palette_cache=PaletteCache(),
+                             palette_mode=args.palette_mode)
+        cli.run()
+
+
+def parse_args(argv=None):
+    """Command-line options (no options = interactive curses UI)."""
+    parser = argparse.ArgumentParser(description="SiteGiffer - Web to GIF")
+    parser.add_argument("--batch", metavar="MANIFEST",
+                        help="Render every row of a CSV/JSON/YAML manifest (url, preset, output)")
+    parser.add_argument("--results", metavar="PATH",
+                        help="Batch results file (default: <manifest>.results.json)")
+    parser.add_argument("--workers", type=int,
+                        help="Batch worker processes (default: sized to cores and RAM)")
+    parser.add_argument("--capture-mode", default=CAPTURE_SCREENCAST,
+                        choices=[CAPTURE_SCREENCAST, CAPTURE_VIRTUAL, CAPTURE_STATIC, CAPTURE_AUTO, CAPTURE_VIDEO],
+                        help="How frames are captured in batch mode")
+    parser.add_argument("--max-size", type=parse_size, metavar="SIZE",
+                        help="Batch size budget per GIF, e.g. 8MB (lowers fps/colors/width to fit)")
+    parser.add_argument("--formats", type=parse_formats, metavar="LIST",
+                        help="Extra batch outputs next to each GIF: webp,mp4,apng (sizes in <name>.outputs.json)")
+    parser.add_argument("--widths", type=parse_widths, metavar="LIST",
+                        help=f"Batch resolution ladder, e.g. {GIF_WIDTH},840,420 (one GIF per width, own palette)")
+    parser.add_argument("--palette-mode", default=PALETTE_GLOBAL, choices=[PALETTE_GLOBAL, PALETTE_PER_FRAME],
+                        help="One palette per GIF, or one per frame (GIF frames written while capturing, "
+                             "larger files)")
+    parser.add_argument("--capture-cache", action="store_true",
+                        help=f"Keep captures in {CAPTURE_CACHE_DIR} and re-encode unchanged pages from there "
+                             f"(captures at {CAPTURE_CACHE_FPS}fps, GIFs are encoded after capture ends)")
+    parser.add_argument("--refresh-captures", action="store_true",
+                        help=f"With the capture cache: record pages again and replace their cached "
+                             f"captures (entries expire after {CAPTURE_CACHE_MAX_AGE_H:g}h anyway)")
+    parser.add_argument("--no-palette-cache", action="store_true",
+                        help=f"Always build palettes from scratch instead of reusing {PALETTE_CACHE_DIR}")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    
+    if args.batch:
+        try:
+            failures = run_batch(args.batch, args.results, args.workers, args.capture_mode, args.max_size,
+                                 use_capture_cache=args.capture_cache or args.refresh_captures,
+                                 formats=args.formats,
+                                 widths=args.widths, use_palette_cache=not args.no_palette_cache,
+                                 refresh_captures=args.refresh_captures, palette_mode=args.palette_mode)
+        except KeyboardInterrupt:
+            print("\n⏹  Interrupted - rerun the same command to resume.")
+            sys.exit(130)
+        sys.exit(1 if failures else 0)
+    
     # Check if we're in a terminal
     if not sys.stdout.isatty():
         print("This application requires an interactive terminal.")
         sys.exit(1)
     
     try:
-        curses.wrapper(main)
+        curses.wrapper(main, args)
     except KeyboardInterrupt:
         pass
     finally:
@@ -44,11 +44,6 @@ echo ""
 echo "🌐 Installing Playwright Chromium browser..."
 playwright install chromium
 
-# Create recordings directory
-echo ""
-echo "📁 Creating recordings directory..."
-mkdir -p recordings
-
 echo ""
 echo "=================================================="
 echo "✅ Setup complete!"